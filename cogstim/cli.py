@@ -23,6 +23,7 @@ from cogstim.generators.match_to_sample import (
     GENERAL_CONFIG as MTS_GENERAL_CONFIG,
 )
 from cogstim.generators.mask import MaskGenerator
+from cogstim.helpers.mts_geometry import NUM_SYMMETRIES
 from cogstim.helpers.constants import (
     IMAGE_DEFAULTS,
     DOT_DEFAULTS,
@@ -98,7 +99,9 @@ def build_shapes_config(args: argparse.Namespace) -> Dict[str, Any]:
         "min_rotation": args.min_rotation,
         "max_rotation": args.max_rotation,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
         "version_tag": args.version_tag,
+        "workers": args.workers,
     }
     
 
@@ -125,7 +128,9 @@ def build_colours_config(args: argparse.Namespace) -> Dict[str, Any]:
         "min_rotation": args.min_rotation,
         "max_rotation": args.max_rotation,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
         "version_tag": args.version_tag,
+        "workers": args.workers,
     }
 
 
@@ -148,9 +153,14 @@ def build_ans_config(args: argparse.Namespace) -> Dict[str, Any]:
             "attempts_limit": args.attempts_limit,
             "seed": args.seed,
             "img_format": args.img_format,
+            "png_compress_level": args.png_compress_level,
             "version_tag": args.version_tag,
             "layout": args.layout,
             "gap": args.gap,
+            "variants": args.variants,
+            "reuse_layouts": args.reuse_layouts,
+            "workers": args.workers,
+            "shard": args.shard,
         },
     }
 
@@ -188,7 +198,10 @@ def build_one_colour_config(args: argparse.Namespace) -> Dict[str, Any]:
             "colour_1": args.dot_colour,
             "colour_2": None,
             "img_format": args.img_format,
+            "png_compress_level": args.png_compress_level,
             "version_tag": args.version_tag,
+            "workers": args.workers,
+            "shard": args.shard,
         },
     }
     
@@ -215,7 +228,10 @@ def build_mts_config(args: argparse.Namespace) -> Dict[str, Any]:
             "init_size": args.img_size,
             "seed": args.seed,
             "img_format": args.img_format,
+            "png_compress_level": args.png_compress_level,
             "version_tag": args.version_tag,
+            "workers": args.workers,
+            "cache_layouts": getattr(args, 'cache_layouts', 0),
         },
     }
     
@@ -248,6 +264,7 @@ def build_mask_config(args: argparse.Namespace) -> Dict[str, Any]:
         "gap": args.gap,
         "seed": args.seed,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
         "version_tag": args.version_tag,
     }
     return cfg
@@ -271,6 +288,7 @@ def build_lines_config(args: argparse.Namespace) -> Dict[str, Any]:
         "background_colour": args.background_colour,
         "seed": args.seed,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
         "version_tag": args.version_tag,
     }
 
@@ -298,6 +316,7 @@ def build_fixation_config(args: argparse.Namespace) -> Dict[str, Any]:
         "symbol_colour": args.symbol_colour,
         "seed": args.seed,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
         "version_tag": args.version_tag,
     }
 
@@ -326,6 +345,8 @@ def build_custom_config(args: argparse.Namespace) -> Dict[str, Any]:
         "max_rotation": args.max_rotation,
         "version_tag": args.version_tag,
         "img_format": args.img_format,
+        "png_compress_level": args.png_compress_level,
+        "workers": args.workers,
     }
 
 
@@ -454,9 +475,18 @@ def add_common_options(parser: argparse.ArgumentParser) -> None:
         "--img-format",
         type=str,
         default=IMAGE_DEFAULTS["img_format"],
-        choices=["png", "jpg", "jpeg", "bmp", "tiff"],
+        choices=["png", "jpg", "jpeg", "bmp", "ppm", "tiff", "webp"],
         help=f"Image format (default: {IMAGE_DEFAULTS['img_format']})"
     )
+    parser.add_argument(
+        "--png-compress-level",
+        type=int,
+        default=IMAGE_DEFAULTS["png_compress_level"],
+        choices=range(10),
+        metavar="{0-9}",
+        help="zlib level for PNG output; higher gives slightly smaller files but "
+             f"saves much slower (default: {IMAGE_DEFAULTS['png_compress_level']})"
+    )
     parser.add_argument(
         "--background-colour",
         type=str,
@@ -509,6 +539,27 @@ def add_train_test_options(parser: argparse.ArgumentParser) -> None:
     )
 
 
+def add_worker_options(parser: argparse.ArgumentParser) -> None:
+    """Add parallel generation options."""
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to generate images; 0 uses all CPU cores (default: 1)"
+    )
+
+
+def add_shard_options(parser: argparse.ArgumentParser) -> None:
+    """Add archive output options."""
+    parser.add_argument(
+        "--shard",
+        choices=["none", "tar"],
+        default="none",
+        help="Write all images into a single tar archive (<output-dir>/images.tar) "
+             "instead of individual files (default: none)"
+    )
+
+
 def add_dot_options(parser: argparse.ArgumentParser, include_ratios: bool = True) -> None:
     """Add dot-array-specific options."""
     if include_ratios:
@@ -607,6 +658,7 @@ def setup_shapes_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_shape_options(parser)
+    add_worker_options(parser)
     
     parser.add_argument(
         "--shapes",
@@ -639,6 +691,7 @@ def setup_colours_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_shape_options(parser)
+    add_worker_options(parser)
     
     parser.add_argument(
         "--shape",
@@ -671,6 +724,8 @@ def setup_ans_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_dot_options(parser, include_ratios=True)
+    add_worker_options(parser)
+    add_shard_options(parser)
     
     parser.add_argument(
         "--dot-colour1",
@@ -699,6 +754,19 @@ def setup_ans_subcommand(subparsers) -> None:
         default=DOT_DEFAULTS["gap"],
         help=f"Pixel gap between left and right halves in separated layout (default: {DOT_DEFAULTS['gap']})"
     )
+    parser.add_argument(
+        "--variants",
+        type=str,
+        choices=["all", "raw", "equalized"],
+        default="all",
+        help="Which variants to generate: 'all', 'raw' (non-equalized only) or 'equalized' (area-equalized only)"
+    )
+    parser.add_argument(
+        "--reuse-layouts",
+        action="store_true",
+        help="Derive the colour-swapped and equalized variants of each pair from one shared dot layout. "
+             "Faster, but the variants are no longer independent samples."
+    )
     parser.add_argument(
         "--tasks-csv",
         type=str,
@@ -730,6 +798,8 @@ def setup_one_colour_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_dot_options(parser, include_ratios=False)
+    add_worker_options(parser)
+    add_shard_options(parser)
     
     parser.add_argument(
         "--dot-colour",
@@ -755,6 +825,7 @@ def setup_mts_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_dot_options(parser, include_ratios=True)
+    add_worker_options(parser)
     
     parser.add_argument(
         "--dot-colour",
@@ -789,6 +860,14 @@ def setup_mts_subcommand(subparsers) -> None:
         metavar="N",
         help="Number of copies of the tasks distribution (default: 1). Applies when --tasks-csv is used."
     )
+    parser.add_argument(
+        "--cache-layouts",
+        type=int,
+        default=0,
+        choices=range(NUM_SYMMETRIES + 1),
+        metavar="K",
+        help=f"Reuse each random (non-equalized) layout for K repetitions of a pair, rotated or mirrored (0 = off, at most {NUM_SYMMETRIES})"
+    )
     
     parser.set_defaults(func=run_mts)
 
@@ -993,6 +1072,7 @@ def setup_custom_subcommand(subparsers) -> None:
     add_common_options(parser)
     add_train_test_options(parser)
     add_shape_options(parser)
+    add_worker_options(parser)
     
     parser.add_argument(
         "--shapes",
@@ -1096,11 +1176,16 @@ def validate_and_adjust_args(args: argparse.Namespace) -> None:
 # =============================================================================
 
 
-def main() -> None:
-    """Main CLI entry point."""
+def main(argv: list[str] | None = None) -> None:
+    """Main CLI entry point.
+
+    Args:
+        argv: Command-line arguments without the program name. Defaults to
+            sys.argv[1:].
+    """
     try:
         parser = create_parser()
-        args = parser.parse_args()
+        args = parser.parse_args(argv)
         
         # If no task specified, show help
         if not hasattr(args, 'func'):
@@ -1,5 +1,4 @@
 import os
-from tqdm import tqdm
 import logging
 
 from cogstim.helpers.dots_core import DotsCore, PointLayoutError
@@ -36,6 +35,26 @@ class DotsANSGenerator(BaseGenerator):
             ANS_EASY_RATIOS, 
             ANS_HARD_RATIOS
         )
+
+        # DotsCore arguments are the same for every image; resolve them once
+        colour_2 = None if self.config["ONE_COLOUR"] else COLOUR_MAP[self.config["colour_2"]]
+        self._dots_kwargs = dict(
+            init_size=IMAGE_DEFAULTS["init_size"],
+            colour_1=COLOUR_MAP[self.config["colour_1"]],
+            colour_2=colour_2,
+            bg_colour=self.config["background_colour"],
+            mode=IMAGE_DEFAULTS["mode"],
+            min_point_radius=self.config["min_point_radius"],
+            max_point_radius=self.config["max_point_radius"],
+            attempts_limit=self.config["attempts_limit"]
+        )
+        self._regions = None
+        if self.config.get("layout", "mixed") == "separated" and not self.config["ONE_COLOUR"]:
+            self._regions = self._compute_separated_regions(
+                IMAGE_DEFAULTS["init_size"],
+                DotsCore.boundary_width,
+                self.config.get("gap", DOT_DEFAULTS["gap"]),
+            )
         
         self.setup_directories()
 
@@ -58,26 +77,33 @@ class DotsANSGenerator(BaseGenerator):
         right = (half + gap / 2, init_size - boundary, boundary, init_size - boundary)
         return left, right
 
-    def create_image(self, n1, n2, equalized):
-        colour_2 = None if self.config["ONE_COLOUR"] else COLOUR_MAP[self.config["colour_2"]]
+    def _check_density(self, n1, n2):
+        """Fail fast when n1 and n2 dots cannot be placed at random.
 
-        number_points = DotsCore(
-            init_size=IMAGE_DEFAULTS["init_size"],
-            colour_1=COLOUR_MAP[self.config["colour_1"]],
-            colour_2=colour_2,
-            bg_colour=self.config["background_colour"],
-            mode=IMAGE_DEFAULTS["mode"],
-            min_point_radius=self.config["min_point_radius"],
-            max_point_radius=self.config["max_point_radius"],
-            attempts_limit=self.config["attempts_limit"]
-        )
+        Raises:
+            TerminalPointLayoutError: If even dots of minimum radius would cover
+                more of the placement area than random placement can fill.
+        """
+        number_points = DotsCore(**self._dots_kwargs)
+        if self._regions is not None:
+            density = max(
+                number_points.placement_density(n1, self._regions[0]),
+                number_points.placement_density(n2, self._regions[1]),
+            )
+        else:
+            density = number_points.placement_density(n1 + n2)
 
-        layout = self.config.get("layout", "mixed")
-        if layout == "separated" and not self.config["ONE_COLOUR"]:
-            gap = self.config.get("gap", DOT_DEFAULTS["gap"])
-            left_region, right_region = self._compute_separated_regions(
-                IMAGE_DEFAULTS["init_size"], number_points.boundary_width, gap
+        if density > number_points.max_random_density:
+            raise TerminalPointLayoutError(
+                f"Dots for pair {n1}-{n2} would cover {density:.0%} of the placement "
+                f"area even at minimum radius, but random placement cannot fill more "
+                f"than {number_points.max_random_density:.0%}. Use fewer or smaller dots."
             )
+
+    def _design_layout(self, number_points, n1, n2):
+        """Place n1 colour_1 dots and n2 colour_2 dots."""
+        if self._regions is not None:
+            left_region, right_region = self._regions
             point_array = number_points.design_n_points(n1, "colour_1", region=left_region)
             point_array = number_points.design_n_points(
                 n2, "colour_2", point_array=point_array, region=right_region
@@ -85,41 +111,117 @@ class DotsANSGenerator(BaseGenerator):
         else:
             point_array = number_points.design_n_points(n1, "colour_1")
             point_array = number_points.design_n_points(n2, "colour_2", point_array=point_array)
+        return point_array
+
+    def _swap_colours(self, point_array):
+        """Return the layout with colour_1 and colour_2 dots exchanged.
+
+        In separated layout the dots are also mirrored horizontally, so that
+        colour_1 dots stay on the left half.
+        """
+        swap = {"colour_1": "colour_2", "colour_2": "colour_1"}
+        size = IMAGE_DEFAULTS["init_size"]
+        swapped = []
+        for (x, y, r), colour in point_array:
+            if self._regions is not None:
+                x = size - x
+            swapped.append(((x, y, r), swap[colour]))
+        return swapped
+
+    def create_image(self, n1, n2, equalized):
+        number_points = DotsCore(**self._dots_kwargs)
+        point_array = self._design_layout(number_points, n1, n2)
 
         if equalized and not self.config["ONE_COLOUR"]:
             point_array = number_points.equalize_areas(point_array)
         return number_points.draw_points(point_array)
 
-    def create_and_save(self, n1, n2, equalized, phase, tag=""):
+    def create_variant_images(self, n1, n2, variants):
+        """Create several variants of a two-colour pair from one dot layout.
+
+        Args:
+            n1: Number of colour_1 dots in the sampled layout
+            n2: Number of colour_2 dots in the sampled layout
+            variants: List of (n1, n2, equalized) tuples; each must be
+                (n1, n2, ...) or the colour-swapped (n2, n1, ...)
+
+        Returns:
+            List of PIL images, one per variant
+        """
+        number_points = DotsCore(**self._dots_kwargs)
+        layout = self._design_layout(number_points, n1, n2)
+
+        images = []
+        for v1, v2, equalized in variants:
+            point_array = layout if (v1, v2) == (n1, n2) else self._swap_colours(layout)
+            if equalized:
+                point_array = number_points.equalize_areas(point_array)
+            # Each variant is drawn on its own canvas
+            images.append(DotsCore(**self._dots_kwargs).draw_points(point_array))
+        return images
+
+    def _get_filename(self, n1, n2, equalized, tag):
         eq = "_equalized" if equalized else ""
         v_tag = f"_{self.config['version_tag']}" if self.config['version_tag'] else ""
         layout = self.config.get("layout", "mixed")
         sep = "_separated" if layout == "separated" else ""
         
-        filename = f"img_{n1}_{n2}_{tag}{eq}{sep}{v_tag}"
+        return f"img_{n1}_{n2}_{tag}{eq}{sep}{v_tag}"
 
+    def _retry_layout(self, create_fn, description):
+        """Call create_fn until it succeeds, retrying on PointLayoutError."""
         attempts = 0
         while attempts < self.config["attempts_limit"]:
             try:
-                self.create_and_save_once(filename, n1, n2, equalized, phase)
+                create_fn()
                 break
             except PointLayoutError as e:
-                logging.debug(f"Failed to create image {filename} because '{e}' Retrying.")
+                logging.debug(f"Failed to create {description} because '{e}' Retrying.")
                 attempts += 1
 
                 if attempts == self.config["attempts_limit"]:
                     raise TerminalPointLayoutError(
-                        f"""Failed to create image {filename} after {attempts} attempts. 
+                        f"""Failed to create {description} after {attempts} attempts. 
                         Your points are probably too big, or there are too many. 
                         Stopping."""
                     )
 
+    def create_and_save(self, n1, n2, equalized, phase, tag=""):
+        self._check_density(n1, n2)
+        filename = self._get_filename(n1, n2, equalized, tag)
+        self._retry_layout(
+            lambda: self.create_and_save_once(filename, n1, n2, equalized, phase),
+            f"image {filename}",
+        )
+
     def create_and_save_once(self, filename, n1, n2, equalized, phase):
         img = self.create_image(n1, n2, equalized)
+        self._save_pair_image(img, filename, n1, n2, phase)
+
+    def _save_pair_image(self, img, filename, n1, n2, phase):
         colour = self.config["colour_1"] if n1 > n2 else self.config["colour_2"]
         
         self.save_image(img, filename, phase, colour)
 
+    def create_and_save_variants(self, n1, n2, variants, phase, tag=""):
+        """Create and save several variants of a pair sharing one dot layout.
+
+        Args:
+            n1, n2: Dot counts of the sampled layout
+            variants: List of (n1, n2, equalized) tuples, see create_variant_images
+            phase: Phase subdirectory ("train" or "test")
+            tag: Repetition tag used in the filenames
+        """
+        self._check_density(n1, n2)
+
+        def create_and_save_once():
+            images = self.create_variant_images(n1, n2, variants)
+            for img, (v1, v2, equalized) in zip(images, variants):
+                filename = self._get_filename(v1, v2, equalized, tag)
+                self._save_pair_image(img, filename, v1, v2, phase)
+
+        self._retry_layout(create_and_save_once, f"images for pair {n1}-{n2} (tag {tag})")
+
     def get_positions(self):
         """Get valid (n1, n2) position pairs based on configured ratios."""
         task_type = "one_colour" if self.config["ONE_COLOUR"] else "ans"
@@ -132,44 +234,71 @@ class DotsANSGenerator(BaseGenerator):
         )
         return plan.compute_positions()
 
+    def _render_task(self, task, phase):
+        """Create and save the image described by a planned task."""
+        if task.task_type == "one_colour":
+            n1 = task.params.get('n')
+            n2 = 0
+            equalized = False
+        else:
+            n1 = task.params.get('n1')
+            n2 = task.params.get('n2', 0)
+            equalized = task.params.get('equalize', False)
+        
+        self.create_and_save(n1, n2, equalized=equalized, phase=phase, tag=task.rep)
+
+    def _render_task_group(self, tasks, phase):
+        """Create and save the variants of one (n1, n2) pair from a shared layout."""
+        variants = [(t.params["n1"], t.params["n2"], t.params["equalize"]) for t in tasks]
+        n1, n2 = variants[0][:2]
+        self.create_and_save_variants(n1, n2, variants, phase=phase, tag=tasks[0].rep)
+
+    def _group_tasks_by_pair(self, tasks):
+        """Group ANS tasks sharing repetition and dot counts (in either order)."""
+        groups = {}
+        for task in tasks:
+            n1, n2 = task.params["n1"], task.params["n2"]
+            key = (task.rep, min(n1, n2), max(n1, n2))
+            groups.setdefault(key, []).append(task)
+        return list(groups.values())
+
     def generate_images(self):
         """Generate images using unified planning mechanism or CSV."""
         task_type = "one_colour" if self.config["ONE_COLOUR"] else "ans"
         tasks_csv = self.config.get("tasks_csv")
         tasks_copies = self.config.get("tasks_copies", 1)
 
-        for phase, num_images in self.iter_phases():
-            if tasks_csv and num_images <= 0:
-                continue
-            plan = GenerationPlan(
-                task_type=task_type,
-                min_point_num=self.config["min_point_num"],
-                max_point_num=self.config["max_point_num"],
-                num_repeats=num_images,
-                ratios=self.ratios
-            )
-            if tasks_csv:
-                copies = max(1, num_images) * tasks_copies
-                plan.build_from_ans_csv(tasks_csv, num_copies=copies)
-            else:
-                plan.build()
+        with self.background_writes():
+            for phase, num_images in self.iter_phases():
+                if tasks_csv and num_images <= 0:
+                    continue
+                plan = GenerationPlan(
+                    task_type=task_type,
+                    min_point_num=self.config["min_point_num"],
+                    max_point_num=self.config["max_point_num"],
+                    num_repeats=num_images,
+                    ratios=self.ratios,
+                    variants=self.config.get("variants", "all"),
+                )
+                if tasks_csv:
+                    copies = max(1, num_images) * tasks_copies
+                    plan.build_from_ans_csv(tasks_csv, num_copies=copies)
+                else:
+                    plan.build()
             
-            self.log_generation_info(
-                f"Generating {len(plan)} images for {phase} in '{self.output_dir}/{phase}'."
-            )
+                self.log_generation_info(
+                    f"Generating {len(plan)} images for {phase} in '{self.output_dir}/{phase}'."
+                )
             
-            for task in tqdm(plan.tasks, desc=f"{phase}"):
-                if task.task_type == "one_colour":
-                    n1 = task.params.get('n')
-                    n2 = 0
-                    equalized = False
+                if self.config.get("reuse_layouts", False) and task_type == "ans":
+                    # One layout per pair, shared by its swapped/equalized variants
+                    groups = self._group_tasks_by_pair(plan.tasks)
+                    self.run_tasks(
+                        "_render_task_group", [(group, phase) for group in groups], desc=phase
+                    )
                 else:
-                    n1 = task.params.get('n1')
-                    n2 = task.params.get('n2', 0)
-                    equalized = task.params.get('equalize', False)
-                
-                rep = task.rep
-                
-                self.create_and_save(n1, n2, equalized=equalized, phase=phase, tag=rep)
+                    self.run_tasks(
+                        "_render_task", [(task, phase) for task in plan.tasks], desc=phase
+                    )
             
-            self.write_summary_if_enabled(plan, phase)
+                self.write_summary_if_enabled(plan, phase)
@@ -145,8 +145,8 @@ class LinesGenerator(BaseGenerator):
         return subdirs
 
 
-def parse_args():
-    """Parse command line arguments."""
+def parse_args(argv=None):
+    """Parse command line arguments (sys.argv[1:] unless argv is given)."""
     parser = argparse.ArgumentParser(
         description="Generate images with rotated stripe patterns."
     )
@@ -197,7 +197,7 @@ def parse_args():
         help="Maximum attempts to generate non-overlapping stripes",
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def main():
@@ -1,11 +1,12 @@
 import os
-from tqdm import tqdm
+from collections import Counter
 
 from cogstim.helpers.dots_core import DotsCore
 from cogstim.helpers.constants import MTS_EASY_RATIOS, MTS_HARD_RATIOS, MTS_DEFAULTS, IMAGE_DEFAULTS
-from cogstim.helpers.mts_geometry import equalize_pair as _equalize_geom
+from cogstim.helpers.mts_geometry import NUM_SYMMETRIES, equalize_pair as _equalize_geom, transform_points
 from cogstim.helpers.planner import GenerationPlan, resolve_ratios
 from cogstim.helpers.base_generator import BaseGenerator
+from cogstim.helpers.random_seed import set_seed, derive_seed
 
 
 # TODO: This should be moved elsewhere
@@ -64,38 +65,46 @@ class MatchToSampleGenerator(BaseGenerator):
     def __init__(self, config):
         super().__init__(config)
         
+        # Each shared layout is shown under a distinct symmetry of the canvas;
+        # beyond NUM_SYMMETRIES repetitions the images would repeat exactly
+        cache_layouts = self.config.get("cache_layouts") or 0
+        if not 0 <= cache_layouts <= NUM_SYMMETRIES:
+            raise ValueError(
+                f"cache_layouts must be between 0 and {NUM_SYMMETRIES}, got {cache_layouts}"
+            )
+        
         self.ratios = resolve_ratios(
             self.config["ratios"],
             MTS_EASY_RATIOS,
             MTS_HARD_RATIOS
         )
         
-        self.setup_directories()
-    
-    def create_image_pair(self, n1, n2, equalize=False):
-        """Create a pair of images (sample and match)."""
-        init_size = self.config["init_size"]
-        
-        # Create sample image
-        s_np = DotsCore(
-            init_size=init_size,
+        # DotsCore arguments are the same for every image; resolve them once
+        self._dots_kwargs = dict(
+            init_size=self.config["init_size"],
             colour_1=self.config["dot_colour"],
             bg_colour=self.config["background_colour"],
             min_point_radius=self.config["min_point_radius"],
             max_point_radius=self.config["max_point_radius"],
             attempts_limit=self.config["attempts_limit"]
         )
+        # Random layouts shared by groups of repetitions (see _cached_random_pair)
+        self._layout_cache = {}
+        
+        self.setup_directories()
+    
+    def _new_dots(self):
+        """Create a blank DotsCore for one image."""
+        return DotsCore(**self._dots_kwargs)
+    
+    def create_image_pair(self, n1, n2, equalize=False):
+        """Create a pair of images (sample and match)."""
+        # Create sample image
+        s_np = self._new_dots()
         s_points = s_np.design_n_points(n1, "colour_1")
         
         # Create match image
-        m_np = DotsCore(
-            init_size=init_size,
-            colour_1=self.config["dot_colour"],
-            bg_colour=self.config["background_colour"],
-            min_point_radius=self.config["min_point_radius"],
-            max_point_radius=self.config["max_point_radius"],
-            attempts_limit=self.config["attempts_limit"]
-        )
+        m_np = self._new_dots()
         m_points = m_np.design_n_points(n2, "colour_1")
         
         # Equalize areas if requested
@@ -120,12 +129,48 @@ class MatchToSampleGenerator(BaseGenerator):
             version_tag=self.config.get("version_tag"),
         )
 
-    def create_and_save(self, trial_id, n1, n2, equalize, phase="train"):
+    def create_and_save(self, trial_id, n1, n2, equalize, phase="train", rep=0, occurrence=0):
         """Create and save a pair of images."""
-        pair = self.create_image_pair(n1, n2, equalize)
+        if self.config.get("cache_layouts") and not equalize:
+            pair = self._cached_random_pair(n1, n2, rep, occurrence)
+        else:
+            pair = self.create_image_pair(n1, n2, equalize)
         if pair is not None:
             self.save_image_pair(pair, trial_id, n1, n2, equalize, phase)
     
+    def _cached_random_pair(self, n1, n2, rep, occurrence=0):
+        """Create a random pair from a layout shared by config['cache_layouts'] repetitions.
+        
+        Repetitions rep // k * k ... rep // k * k + k - 1 of an (n1, n2) pair
+        reuse one layout, each under a different rotation/reflection of the
+        canvas (see transform_points), so k may be at most NUM_SYMMETRIES.
+        The plan can hold the same (n1, n2, rep) task several times (e.g.
+        (n, n) controls of different ratio pairs); occurrence tells those
+        apart so they never share a layout and transform. Shared layouts are
+        seeded from the key rather than from the task, so they do not depend
+        on which task designs them first.
+        """
+        k = self.config["cache_layouts"]
+        key = (self._task_runs, n1, n2, occurrence, rep // k)
+        if key not in self._layout_cache:
+            set_seed(derive_seed(self.config.get("seed"), *key))
+            _, s_points, _, m_points = self.create_image_pair(n1, n2)
+            self._layout_cache[key] = (s_points, m_points)
+        
+        s_points, m_points = self._layout_cache[key]
+        size = self.config["init_size"]
+        return (
+            self._new_dots(), transform_points(s_points, size, rep % k),
+            self._new_dots(), transform_points(m_points, size, rep % k),
+        )
+    
+    def _render_task(self, trial_id, task, phase, occurrence=0):
+        """Create and save the image pair described by a planned task."""
+        n = task.params.get("n1")
+        m = task.params.get("n2")
+        equalize = task.params.get("equalize", False)
+        self.create_and_save(trial_id, n, m, equalize, phase, rep=task.rep, occurrence=occurrence)
+
     def get_subdirectories(self):
         return [("train",), ("test",)]
     
@@ -135,31 +180,40 @@ class MatchToSampleGenerator(BaseGenerator):
         tasks_copies = self.config.get("tasks_copies", 1)
         total_pairs = 0
 
-        for phase, num_images in self.iter_phases():
-            if num_images <= 0:
-                continue
-            plan = GenerationPlan(
-                task_type="mts",
-                min_point_num=self.config["min_point_num"],
-                max_point_num=self.config["max_point_num"],
-                num_repeats=num_images,
-                ratios=self.ratios
-            )
-            if tasks_csv:
-                copies = max(1, num_images) * tasks_copies
-                plan.build_from_mts_csv(tasks_csv, num_copies=copies)
-            else:
-                plan.build()
-
-            self.log_generation_info(f"Generating {len(plan)} image pairs for {phase}...")
-            total_pairs += len(plan)
-
-            for trial_id, task in enumerate(tqdm(plan.tasks, desc=f"{phase}")):
-                n = task.params.get("n1")
-                m = task.params.get("n2")
-                equalize = task.params.get("equalize", False)
-                self.create_and_save(trial_id, n, m, equalize, phase)
-
-            self.write_summary_if_enabled(plan, phase)
+        # Encode and write each pair on a background thread while the next
+        # pair's layout is being designed
+        with self.background_writes():
+            for phase, num_images in self.iter_phases():
+                if num_images <= 0:
+                    continue
+                plan = GenerationPlan(
+                    task_type="mts",
+                    min_point_num=self.config["min_point_num"],
+                    max_point_num=self.config["max_point_num"],
+                    num_repeats=num_images,
+                    ratios=self.ratios
+                )
+                if tasks_csv:
+                    copies = max(1, num_images) * tasks_copies
+                    plan.build_from_mts_csv(tasks_csv, num_copies=copies)
+                else:
+                    plan.build()
+
+                self.log_generation_info(f"Generating {len(plan)} image pairs for {phase}...")
+                total_pairs += len(plan)
+                self._layout_cache.clear()
+
+                # Number repeated (n1, n2, rep) tasks in plan order so cached
+                # layouts stay distinct and independent of worker scheduling
+                seen = Counter()
+                args = []
+                for trial_id, task in enumerate(plan.tasks):
+                    task_key = (task.params.get("n1"), task.params.get("n2"), task.rep)
+                    args.append((trial_id, task, phase, seen[task_key]))
+                    seen[task_key] += 1
+
+                self.run_tasks("_render_task", args, desc=phase)
+
+                self.write_summary_if_enabled(plan, phase)
 
         return total_pairs
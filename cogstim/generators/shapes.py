@@ -2,7 +2,6 @@ import os
 import math
 import random
 import numpy as np
-from tqdm import tqdm
 
 from cogstim.helpers.constants import COLOUR_MAP, IMAGE_DEFAULTS, SHAPE_DEFAULTS
 from cogstim.helpers.base_generator import BaseGenerator
@@ -10,6 +9,30 @@ from cogstim.helpers.image_utils import ImageCanvas
 from cogstim.helpers.planner import GenerationPlan
 
 
+def _star_directions():
+    """Unit (cos, sin) directions of the 5 outer and 5 inner star vertices.
+
+    Outer vertices start from the top (-pi/2) and go clockwise; each inner
+    vertex is rotated 36 degrees from the preceding outer one.
+    """
+    directions = []
+    for i in range(5):
+        angle_rad = -np.pi/2 + i * 2 * np.pi / 5
+        directions.append((np.cos(angle_rad), np.sin(angle_rad)))
+        angle_rad += np.pi / 5
+        directions.append((np.cos(angle_rad), np.sin(angle_rad)))
+    return tuple(directions)
+
+
+# Star geometry terms do not depend on size or position; compute them once
+_STAR_DIRECTIONS = _star_directions()
+_SIN_PI_10 = np.sin(np.pi / 10)
+_SIN_7PI_10 = np.sin(7 * np.pi / 10)
+# Constant terms of the surface-to-radius formulas (see get_radius_from_surface)
+_SQRT_3 = math.sqrt(3)
+_STAR_AREA_TERM = np.sqrt((25 - 11 * np.sqrt(5)) / 2)
+
+
 class ShapesGenerator(BaseGenerator):
     """
     A class for generating images with geometric shapes for machine learning tasks.
@@ -43,6 +66,8 @@ class ShapesGenerator(BaseGenerator):
         random_rotation,
         min_rotation=None,
         max_rotation=None,
+        workers=1,
+        png_compress_level=IMAGE_DEFAULTS["png_compress_level"],
     ):
 
         # If random_rotation is True, min_rotation and max_rotation must be provided
@@ -79,6 +104,8 @@ class ShapesGenerator(BaseGenerator):
             'max_rotation': max_rotation,
             'img_format': img_format,
             'version_tag': version_tag,
+            'workers': workers,
+            'png_compress_level': png_compress_level,
         }
         super().__init__(config)
         
@@ -97,6 +124,9 @@ class ShapesGenerator(BaseGenerator):
         self.min_rotation = min_rotation
         self.max_rotation = max_rotation
         self.img_paths = {}
+        # Without jitter or rotation, a (shape, colour, surface) always gives
+        # the same image; it is drawn and encoded once (see _render_task)
+        self._encoded_shapes = {}
 
     def get_subdirectories(self):
         """Get list of subdirectories for train/test and classes."""
@@ -160,37 +190,23 @@ class ShapesGenerator(BaseGenerator):
             # For an equilateral triangle:
             # A = (√3/4) * (2r)² = √3 * r²
             # where r is the distance from center to any vertex
-            return math.sqrt(surface / math.sqrt(3))
+            return math.sqrt(surface / _SQRT_3)
 
         elif shape == "star":
-            return np.sqrt(2 / 5 * surface * 1 / np.sqrt((25 - 11 * np.sqrt(5)) / 2))
+            return np.sqrt(2 / 5 * surface * 1 / _STAR_AREA_TERM)
 
         else:
             raise ValueError(f"Shape {shape} not implemented.")
 
     @staticmethod
     def create_star_vertices(center, radius):
-        inner_radius = 1 / 1.014 * radius * np.sin(np.pi / 10) / np.sin(7 * np.pi / 10)
+        inner_radius = 1 / 1.014 * radius * _SIN_PI_10 / _SIN_7PI_10
 
         vertices = []
-        for i in range(5):
-            # Outer vertices (points of the star)
-            angle_rad = -np.pi/2 + i * 2 * np.pi / 5  # Start from top (-pi/2) and go clockwise
-            vertices.append(
-                (
-                    center[0] + radius * np.cos(angle_rad),
-                    center[1] + radius * np.sin(angle_rad),
-                )
-            )
-
-            # Inner vertices
-            angle_rad += np.pi / 5  # Rotate by 36 degrees (π/5 radians)
-            vertices.append(
-                (
-                    center[0] + inner_radius * np.cos(angle_rad),
-                    center[1] + inner_radius * np.sin(angle_rad),
-                )
-            )
+        for i, (cos, sin) in enumerate(_STAR_DIRECTIONS):
+            # Even vertices are the points of the star, odd ones the inner corners
+            r = inner_radius if i % 2 else radius
+            vertices.append((center[0] + r * cos, center[1] + r * sin))
 
         return vertices
     
@@ -263,9 +279,10 @@ class ShapesGenerator(BaseGenerator):
         dist_y = random.randint(-max_jitter, max_jitter)
         center = (int(pixels_x / 2) + dist_x, int(pixels_y / 2) + dist_y)
 
-        # Calculate jitter metadata for image filename
-        distance = int(np.sqrt(dist_x**2 + dist_y**2))
-        angle = int((np.arctan2(dist_y, dist_x) / np.pi + 1) * 180)
+        # Calculate jitter metadata for image filename (scalar math functions
+        # avoid NumPy's per-call overhead)
+        distance = int(math.sqrt(dist_x**2 + dist_y**2))
+        angle = int((math.atan2(dist_y, dist_x) / math.pi + 1) * 180)
         
         # Generate random rotation if enabled
         rotation = 0
@@ -281,52 +298,65 @@ class ShapesGenerator(BaseGenerator):
         return canvas.img, distance, angle, rotation
     
     def save_shape_image(self, image, shape, surface, dist_from_center, angle, it, rotation=0, *subdirs):
-        """Save a shape image with proper filename construction."""
+        """Save a shape image (or its encode_image() bytes) with proper filename construction."""
         filename = f"{shape}_{surface}_{dist_from_center}_{angle}_{rotation}_{it}"
-        self.save_image(image, filename, *subdirs)
+        if isinstance(image, bytes):
+            self.save_encoded(image, filename, *subdirs)
+        else:
+            self.save_image(image, filename, *subdirs)
+
+    def _render_task(self, task, phase):
+        """Draw and save the image described by a planned task."""
+        shape = task.params['shape']
+        color_name = task.params['color']
+        surface = task.params['surface']
+        
+        # Determine save subdirectories based on task type
+        if self.task_type == "two_shapes":
+            subdirs = (phase, shape)
+        elif self.task_type == "two_colors":
+            subdirs = (phase, color_name)
+        else:  # custom
+            class_name = f"{shape}_{color_name}"
+            subdirs = (phase, class_name)
+        
+        # Get color code
+        color_code = self.colors[color_name]
+        
+        if self.jitter or self.random_rotation:
+            # Generate image
+            image, dist, angle, rotation = self.draw_shape(shape, surface, color_code, self.jitter)
+            self.save_shape_image(image, shape, surface, dist, angle, task.rep, rotation, *subdirs)
+        else:
+            key = (shape, color_name, surface)
+            if key not in self._encoded_shapes:
+                image, dist, angle, rotation = self.draw_shape(shape, surface, color_code)
+                self._encoded_shapes[key] = (self.encode_image(image), dist, angle, rotation)
+            data, dist, angle, rotation = self._encoded_shapes[key]
+            self.save_shape_image(data, shape, surface, dist, angle, task.rep, rotation, *subdirs)
 
     def generate_images(self):
         """Generate all images for training and testing using unified planner."""
         self.setup_directories()
 
-        for phase, num_images in self.iter_phases():
-            # Build generation plan
-            plan = GenerationPlan(
-                task_type="shapes",
-                num_repeats=num_images,
-                shapes=self.shapes,
-                colors=list(self.colors.keys()),
-                min_surface=self.min_surface,
-                max_surface=self.max_surface,
-                surface_step=100
-            ).build(task_subtype=self.task_type)
-            
-            self.log_generation_info(
-                f"Generating {len(plan)} images for {phase} in '{self.output_dir}/{phase}'."
-            )
-            
-            # Execute plan
-            for task in tqdm(plan.tasks, desc=f"{phase}"):
-                shape = task.params['shape']
-                color_name = task.params['color']
-                surface = task.params['surface']
-                rep = task.rep
-                
-                # Get color code
-                color_code = self.colors[color_name]
+        with self.background_writes():
+            for phase, num_images in self.iter_phases():
+                # Build generation plan
+                plan = GenerationPlan(
+                    task_type="shapes",
+                    num_repeats=num_images,
+                    shapes=self.shapes,
+                    colors=list(self.colors.keys()),
+                    min_surface=self.min_surface,
+                    max_surface=self.max_surface,
+                    surface_step=100
+                ).build(task_subtype=self.task_type)
                 
-                # Generate image
-                image, dist, angle, rotation = self.draw_shape(shape, surface, color_code, self.jitter)
-                
-                # Determine save subdirectories based on task type
-                if self.task_type == "two_shapes":
-                    subdirs = (phase, shape)
-                elif self.task_type == "two_colors":
-                    subdirs = (phase, color_name)
-                else:  # custom
-                    class_name = f"{shape}_{color_name}"
-                    subdirs = (phase, class_name)
+                self.log_generation_info(
+                    f"Generating {len(plan)} images for {phase} in '{self.output_dir}/{phase}'."
+                )
                 
-                self.save_shape_image(image, shape, surface, dist, angle, rep, rotation, *subdirs)
+                # Execute plan
+                self.run_tasks("_render_task", [(task, phase) for task in plan.tasks], desc=phase)
 
-            self.write_summary_if_enabled(plan, phase)
+                self.write_summary_if_enabled(plan, phase)
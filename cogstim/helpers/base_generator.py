@@ -8,10 +8,53 @@ directory setup, and the image generation interface.
 """
 
 import os
+import random
 import logging
+import multiprocessing
 from abc import ABC
+from contextlib import contextmanager, suppress
+from functools import partial
 from typing import Dict, Any
-from cogstim.helpers.random_seed import set_seed
+
+import numpy as np
+from tqdm import tqdm
+
+from cogstim.helpers.random_seed import set_seed, derive_seed
+from cogstim.helpers.constants import IMAGE_DEFAULTS
+from cogstim.helpers.image_utils import encode_image, save_image_file, write_encoded_file
+from cogstim.helpers.image_writer import (
+    BackgroundImageWriter,
+    EncodedImageBuffer,
+    TarImageWriter,
+)
+
+
+# Generator used by the tasks of a worker process. It is sent once per worker
+# (see _init_worker) instead of being pickled again with every task.
+_worker_generator = None
+
+
+def _init_worker(generator, collect_images=False):
+    global _worker_generator
+    _worker_generator = generator
+    # The parent's background writer thread does not exist in this process.
+    # When the parent writes an archive, images are encoded here and sent
+    # back to it (see _run_worker_task).
+    generator._writer = EncodedImageBuffer() if collect_images else None
+    # Without a seed, reseed from OS entropy so that workers never share
+    # a random state and produce identical images.
+    if generator.config.get("seed") is None:
+        random.seed()
+        np.random.seed()
+
+
+def _run_worker_task(method_name, seeded_args):
+    seed, args = seeded_args
+    set_seed(seed)
+    getattr(_worker_generator, method_name)(*args)
+    if isinstance(_worker_generator._writer, EncodedImageBuffer):
+        return _worker_generator._writer.drain()
+    return None
 
 
 class BaseGenerator(ABC):
@@ -57,6 +100,15 @@ class BaseGenerator(ABC):
         # Set seed for reproducibility if provided
         seed = config.get("seed", None)
         set_seed(seed)
+        self._task_runs = 0
+        self._writer = None
+    
+    def __getstate__(self):
+        # The background writer (a thread) cannot be pickled; worker
+        # processes save their images directly.
+        state = self.__dict__.copy()
+        state["_writer"] = None
+        return state
     
     @property
     def output_dir(self) -> str:
@@ -110,6 +162,116 @@ class BaseGenerator(ABC):
         """
         return [("train", self.train_num), ("test", self.test_num)]
     
+    def get_num_workers(self) -> int:
+        """
+        Get the number of worker processes used to generate images.
+        
+        Returns:
+            int: config['workers'] (default 1). A value of 0 or None means
+                 one worker per available CPU core.
+        """
+        workers = self.config.get("workers", 1)
+        if not workers:
+            workers = os.cpu_count() or 1
+        return workers
+    
+    def run_tasks(self, method_name: str, tasks: list, desc: str = None):
+        """
+        Call a generator method once per task, in parallel if configured.
+        
+        With a single worker, tasks run in order in the current process. With
+        several workers, tasks are distributed over a process pool. Either way,
+        each task gets its own seed derived from config['seed'], so results
+        are reproducible and do not depend on the number of workers or on how
+        tasks are scheduled.
+        
+        Args:
+            method_name: Name of the generator method to call for each task
+            tasks: List of positional argument tuples, one per call
+            desc: Optional progress bar description
+        """
+        self._task_runs += 1
+        seed = self.config.get("seed")
+        seeded_tasks = [
+            (derive_seed(seed, self._task_runs, i), args)
+            for i, args in enumerate(tasks)
+        ]
+        
+        # Refresh the progress bar at most ~200 times per run
+        progress = dict(desc=desc, miniters=max(1, len(tasks) // 200), mininterval=0.5)
+        
+        workers = self.get_num_workers()
+        if workers <= 1 or len(tasks) <= 1:
+            for task_seed, args in tqdm(seeded_tasks, **progress):
+                set_seed(task_seed)
+                getattr(self, method_name)(*args)
+            return
+        
+        chunksize = max(1, len(tasks) // (workers * 4))
+        archive = self._writer if isinstance(self._writer, TarImageWriter) else None
+        
+        # Workers must not be forked from this process: run_tasks is called
+        # inside background_writes(), whose writer thread may hold locks (and
+        # queued images) at fork time. The generator is pickled instead.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        else:
+            context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            workers, initializer=_init_worker, initargs=(self, archive is not None)
+        ) as pool:
+            results = pool.imap_unordered(
+                partial(_run_worker_task, method_name), seeded_tasks, chunksize=chunksize
+            )
+            for encoded in tqdm(results, total=len(tasks), **progress):
+                for data, path in encoded or ():
+                    archive.write_encoded(data, path)
+    
+    @contextmanager
+    def background_writes(self, maxsize: int = 64):
+        """
+        Save images on a background thread for the duration of the block.
+        
+        Inside the block, save_image only queues images, so drawing the next
+        image overlaps with encoding and writing the previous ones. All images
+        are on disk when the block exits.
+        
+        If config['shard'] is "tar", images are added to a single archive
+        (see get_archive_path) instead of being written as separate files.
+        
+        Args:
+            maxsize: Maximum number of images waiting to be saved
+        
+        Example:
+            with self.background_writes():
+                for task in tasks:
+                    self.save_image(self.create_image(task), ...)
+        """
+        if self.config.get("shard", "none") == "tar":
+            writer = TarImageWriter(self.get_archive_path(), self.output_dir, maxsize=maxsize)
+        else:
+            writer = BackgroundImageWriter(maxsize=maxsize)
+        self._writer = writer
+        try:
+            yield
+        except BaseException:
+            # The block's own error takes precedence over failed saves
+            self._writer = None
+            with suppress(Exception):
+                writer.close()
+            raise
+        self._writer = None
+        writer.close()
+    
+    def get_archive_path(self) -> str:
+        """
+        Get the path of the tar archive used when config['shard'] is "tar".
+        
+        Returns:
+            str: output_dir/images.tar
+        """
+        return os.path.join(self.output_dir, "images.tar")
+    
     def write_summary_if_enabled(self, plan, phase: str):
         """
         Write summary CSV for the given phase if summary is enabled in config.
@@ -136,13 +298,74 @@ class BaseGenerator(ABC):
         Convert image format to file extension.
         
         Args:
-            img_format: Image format (e.g., 'png', 'jpeg', 'jpg', 'bmp', 'tiff')
+            img_format: Image format (e.g., 'png', 'jpeg', 'jpg', 'bmp', 'ppm', 'tiff', 'webp')
         
         Returns:
             str: File extension (e.g., 'png', 'jpg', 'bmp', 'tiff')
         """
         return "jpg" if img_format == "jpeg" else img_format
     
+    def get_image_path(self, filename_without_ext: str, *subdirs) -> str:
+        """
+        Get the path an image is saved to, with the configured file extension.
+        
+        Args:
+            filename_without_ext: Filename without extension (e.g., "img_5_0_v1")
+            *subdirs: Subdirectory names below output_dir
+        
+        Returns:
+            str: output_dir/subdirs.../filename.ext
+        """
+        ext = self._get_file_extension(self.get_img_format())
+        return os.path.join(self.output_dir, *subdirs, f"{filename_without_ext}.{ext}")
+    
+    def get_save_kwargs(self) -> dict:
+        """
+        Get the encoder arguments of the configured image format.
+        
+        PNG is written unfiltered with a fast zlib level (see
+        config['png_compress_level']), JPEG at quality 95 and WebP lossless.
+        
+        Returns:
+            dict: Arguments for save_image_file() / encode_image()
+        """
+        img_format = self.get_img_format()
+        if img_format in ["jpg", "jpeg"]:
+            return {"format": "JPEG", "quality": 95}
+        elif img_format == "png":
+            compress_level = self.config.get(
+                "png_compress_level", IMAGE_DEFAULTS["png_compress_level"]
+            )
+            return {"format": "PNG", "compress_level": compress_level}
+        elif img_format == "webp":
+            return {"format": "WEBP", "lossless": True, "method": 0}
+        else:
+            return {"format": img_format.upper()}
+    
+    @staticmethod
+    def _to_pil(img):
+        """Normalize an ImageCanvas, DotsCore or PIL image to a PIL Image."""
+        if hasattr(img, 'canvas') and hasattr(img, 'draw_points'):
+            # DotsCore instance
+            return img.canvas.img
+        elif hasattr(img, '_img'):
+            # ImageCanvas wrapper
+            return img._img
+        # Already a PIL Image
+        return img
+    
+    def encode_image(self, img) -> bytes:
+        """
+        Encode an image in the configured format, as save_image would write it.
+        
+        Args:
+            img: PIL Image, ImageCanvas or DotsCore instance
+        
+        Returns:
+            bytes: The encoded file contents, for save_encoded()
+        """
+        return encode_image(self._to_pil(img), **self.get_save_kwargs())
+    
     def save_image(self, img, filename_without_ext: str, *subdirs):
         """
         Save an image to disk with proper path construction and format handling.
@@ -151,7 +374,8 @@ class BaseGenerator(ABC):
         - Path construction from output_dir + subdirectories + filename
         - Format conversion (jpeg → jpg extension)
         - Normalization of different image types to PIL Image
-        - Actual file saving with appropriate format parameters
+        - Actual file saving with appropriate format parameters (see
+          get_save_kwargs)
         
         Args:
             img: Image to save. Can be:
@@ -167,27 +391,28 @@ class BaseGenerator(ABC):
             self.save_image(img, "img_5_0", "train", "yellow")
             # Saves to: output_dir/train/yellow/img_5_0.png
         """
-        # Get format and extension
-        img_format = self.get_img_format()
-        ext = self._get_file_extension(img_format)
-        
-        # Build complete file path
-        filename = f"{filename_without_ext}.{ext}"
-        path = os.path.join(self.output_dir, *subdirs, filename)
+        path = self.get_image_path(filename_without_ext, *subdirs)
+        pil_img = self._to_pil(img)
+        save_kwargs = self.get_save_kwargs()
         
-        # Normalize image to PIL Image
-        if hasattr(img, 'canvas') and hasattr(img, 'draw_points'):
-            # DotsCore instance
-            pil_img = img.canvas.img
-        elif hasattr(img, '_img'):
-            # ImageCanvas wrapper
-            pil_img = img._img
+        if self._writer is not None:
+            self._writer.write(pil_img, path, **save_kwargs)
         else:
-            # Already a PIL Image
-            pil_img = img
+            save_image_file(pil_img, path, **save_kwargs)
+    
+    def save_encoded(self, data: bytes, filename_without_ext: str, *subdirs):
+        """
+        Save an image already encoded by encode_image().
         
-        # Save with appropriate format
-        if img_format in ["jpg", "jpeg"]:
-            pil_img.save(path, format="JPEG", quality=95)
+        Lets generators that produce identical images encode them only once.
+        
+        Args:
+            data: Encoded image file contents
+            filename_without_ext: Filename without extension
+            *subdirs: Subdirectory names below output_dir, as in save_image
+        """
+        path = self.get_image_path(filename_without_ext, *subdirs)
+        if self._writer is not None:
+            self._writer.write_encoded(data, path)
         else:
-            pil_img.save(path, format=img_format.upper())
+            write_encoded_file(data, path)
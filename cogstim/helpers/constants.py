@@ -76,8 +76,15 @@ IMAGE_DEFAULTS = {
     "background_colour": "white",
     "mode": "RGB",
     "img_format": "png",
+    # zlib level for PNG output. Stimuli are flat-colour images, so higher
+    # levels barely shrink the files but make saving several times slower.
+    "png_compress_level": 1,
 }
 
+# Write buffer for summary CSV files (1 MB), so that long summaries reach the
+# disk in a few large writes instead of one per 8 KB
+CSV_BUFFER_SIZE = 1 << 20
+
 # CLI defaults
 CLI_DEFAULTS = {
     "train_num": 10,
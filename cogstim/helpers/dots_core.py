@@ -1,18 +1,62 @@
 import itertools
-from random import randint
 import numpy as np
 
+from cogstim.helpers.image_utils import ImageCanvas
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional: pip install cogstim[speed]
+    njit = None
+
 
 class PointLayoutError(ValueError):
     pass
 
 
+def _first_fitting_candidate_vectorized(x, y, r, placed_x, placed_y, placed_r, sep):
+    """Index of the first candidate dot that clears all placed dots, or -1."""
+    dist = np.sqrt((x[:, None] - placed_x) ** 2 + (y[:, None] - placed_y) ** 2)
+    fits = np.flatnonzero((dist > r[:, None] + placed_r + sep).all(axis=1))
+    return fits[0] if fits.size else -1
+
+
+def _first_fitting_candidate_loop(x, y, r, placed_x, placed_y, placed_r, sep):
+    """Scalar version of the overlap test, compiled with numba when available.
+
+    Stops at the first collision of each candidate instead of computing the
+    full candidate x placed distance matrix.
+    """
+    for i in range(x.shape[0]):
+        fits = True
+        for j in range(placed_x.shape[0]):
+            dx = x[i] - placed_x[j]
+            dy = y[i] - placed_y[j]
+            min_dist = r[i] + placed_r[j] + sep
+            if dx * dx + dy * dy <= min_dist * min_dist:
+                fits = False
+                break
+        if fits:
+            return i
+    return -1
+
+
+if njit is not None:
+    _first_fitting_candidate = njit(cache=True)(_first_fitting_candidate_loop)
+else:
+    _first_fitting_candidate = _first_fitting_candidate_vectorized
+
+
 class DotsCore:
 
     boundary_width = 5
     point_sep = 10
     # We consider equal areas if their (r1 - r2) / r1 ratio differs by less than this number:
     area_tolerance = 0.001
+    # Number of random candidates drawn and checked at once when placing a dot
+    candidate_batch = 32
+    # Coverage at which random sequential placement of disks jams (about 0.547);
+    # beyond it, placing dots at random practically never succeeds
+    max_random_density = 0.547
 
     def __init__(self, init_size, colour_1, colour_2=None, bg_colour=None, mode=None,
                  min_point_radius=None, max_point_radius=None, attempts_limit=None):
@@ -28,7 +72,6 @@ class DotsCore:
             max_point_radius: Maximum dot radius (uses defaults.DOT_DEFAULTS if None)
             attempts_limit: Maximum attempts to place dots without overlap (uses defaults.DOT_DEFAULTS if None)
         """
-        from cogstim.helpers.image_utils import ImageCanvas
         from cogstim.helpers.constants import IMAGE_DEFAULTS, DOT_DEFAULTS
         
         # Apply defaults if not provided
@@ -38,7 +81,10 @@ class DotsCore:
         max_point_radius = max_point_radius if max_point_radius is not None else DOT_DEFAULTS["max_point_radius"]
         attempts_limit = attempts_limit if attempts_limit is not None else DOT_DEFAULTS["attempts_limit"]
         
-        self.canvas = ImageCanvas(init_size, bg_colour, mode)
+        # The canvas is only allocated when points are drawn (see `canvas`)
+        self._canvas = None
+        self.bg_colour = bg_colour
+        self.mode = mode
         self.init_size = init_size
         self.colour_1 = colour_1
         self.colour_2 = colour_2
@@ -46,22 +92,88 @@ class DotsCore:
         self.max_point_radius = max_point_radius
         self.attempts_limit = attempts_limit
 
-    def _create_random_point(self):
-        radius = randint(self.min_point_radius, self.max_point_radius)
-        limit = self.boundary_width + radius + self.point_sep
+    @property
+    def canvas(self):
+        """Image canvas, created on first access.
+
+        Layouts that fail (and are retried) never draw, so they never pay for
+        allocating and filling an image.
+        """
+        if self._canvas is None:
+            self._canvas = ImageCanvas(self.init_size, self.bg_colour, self.mode)
+        return self._canvas
+
+    def placement_density(self, n, region=None):
+        """Fraction of the placement area covered by *n* dots of minimum radius.
+
+        Dots must stay point_sep apart, so each one effectively takes up a disk
+        of radius r + point_sep / 2.
+
+        Args:
+            n: Number of dots.
+            region: Optional ``(x_min, x_max, y_min, y_max)`` placement
+                rectangle, as in design_n_points.
+        """
+        dot_area = n * np.pi * (self.min_point_radius + self.point_sep / 2) ** 2
+        if region is None:
+            radius = self.init_size / 2 - self.boundary_width - self.point_sep / 2
+            available = np.pi * radius ** 2
+        else:
+            x_min, x_max, y_min, y_max = region
+            available = (x_max - x_min - self.point_sep) * (y_max - y_min - self.point_sep)
+        return dot_area / available
+
+    def _random_radii(self, u):
+        span = self.max_point_radius - self.min_point_radius + 1
+        return self.min_point_radius + (u * span).astype(int)
+
+    @staticmethod
+    def _random_ints(u, low, high):
+        """Map uniform samples *u* in [0, 1) to integers in [low, high]."""
+        if np.any(high < low):
+            raise ValueError("Dots are too big for the available placement area.")
+        return low + (u * (high - low + 1)).astype(int)
+
+    def _create_random_points(self, k):
+        """Draw *k* random candidate dots inside the central circle.
+
+        Returns:
+            Tuple of arrays ``(x, y, radius)``, each of length *k*.
+        """
+        u = np.random.random((3, k))
+        radii = self._random_radii(u[0])
+        limit = self.boundary_width + radii + self.point_sep
 
         # Change mental coordinate system to the center of the square
-        rad = int(self.init_size / 2 - limit)
-        rx = randint(-rad, rad)
+        half_side = self.init_size / 2 - limit
+        rad = half_side.astype(int)
+        rx = self._random_ints(u[1], -rad, rad)
         # Make sure we are always inside the circle
-        max_ = int(np.sqrt((self.init_size / 2 - limit) ** 2 - rx ** 2))
-        ry = randint(-max_, max_)
+        max_ = np.sqrt(half_side ** 2 - rx ** 2).astype(int)
+        ry = self._random_ints(u[2], -max_, max_)
 
         # Transform to coordinates with origin on the upper left quadrant
         x = rx + self.init_size / 2
         y = ry + self.init_size / 2
 
-        return x, y, radius
+        return x, y, radii
+
+    def _create_random_points_in_rect(self, k, x_min, x_max, y_min, y_max):
+        """Draw *k* random candidate dots constrained to a rectangular region.
+
+        Each dot (center +/- radius + point_sep) is guaranteed to fit inside
+        the rectangle defined by (x_min, x_max, y_min, y_max).
+        """
+        u = np.random.random((3, k))
+        radii = self._random_radii(u[0])
+        margin = radii + self.point_sep
+        x = self._random_ints(u[1], (x_min + margin).astype(int), (x_max - margin).astype(int))
+        y = self._random_ints(u[2], (y_min + margin).astype(int), (y_max - margin).astype(int))
+        return x, y, radii
+
+    def _create_random_point(self):
+        x, y, radius = self._create_random_points(1)
+        return x[0].item(), y[0].item(), radius[0].item()
 
     def _create_random_point_in_rect(self, x_min, x_max, y_min, y_max):
         """Generate a random dot constrained to a rectangular region.
@@ -69,11 +181,8 @@ class DotsCore:
         The dot (center +/- radius + point_sep) is guaranteed to fit inside the
         rectangle defined by (x_min, x_max, y_min, y_max).
         """
-        radius = randint(self.min_point_radius, self.max_point_radius)
-        margin = radius + self.point_sep
-        x = randint(int(x_min + margin), int(x_max - margin))
-        y = randint(int(y_min + margin), int(y_max - margin))
-        return x, y, radius
+        x, y, radius = self._create_random_points_in_rect(1, x_min, x_max, y_min, y_max)
+        return x[0].item(), y[0].item(), radius[0].item()
 
     def _check_no_overlaps(self, point_array, new_point):
         return all([self._check_points_not_overlapping(a[0], new_point) for a in point_array])
@@ -98,21 +207,35 @@ class DotsCore:
             point_array = []
 
         if region is not None:
-            def point_fn():
-                return self._create_random_point_in_rect(*region)
+            def points_fn(k):
+                return self._create_random_points_in_rect(k, *region)
         else:
-            point_fn = self._create_random_point
+            points_fn = self._create_random_points
 
-        for _ in range(n):
-            new_point = point_fn()
+        # Placed dots as arrays, so each batch of candidates is checked
+        # against all of them in a single vectorized operation
+        num_placed = len(point_array)
+        placed = np.empty((num_placed + n, 3))
+        for j, a in enumerate(point_array):
+            placed[j] = a[0]
 
-            attempts = 0
-            while not self._check_no_overlaps(point_array, new_point):
-                new_point = point_fn()
-                attempts += 1
-                if attempts > self.attempts_limit:
+        for _ in range(n):
+            px, py, pr = np.ascontiguousarray(placed[:num_placed].T)
+            remaining = self.attempts_limit + 1
+            while True:
+                if remaining <= 0:
                     raise PointLayoutError("Too many attempts to create a good layout.")
+                k = min(self.candidate_batch, remaining)
+                x, y, r = points_fn(k)
+                i = _first_fitting_candidate(x, y, r, px, py, pr, self.point_sep)
+                if i >= 0:
+                    break
+                remaining -= k
+
+            new_point = (x[i].item(), y[i].item(), r[i].item())
             point_array.append((new_point, colour))
+            placed[num_placed] = new_point
+            num_placed += 1
 
         return point_array
 
@@ -151,6 +274,27 @@ class DotsCore:
 
         return small, big_area, small_area
 
+    @staticmethod
+    def _as_arrays(point_array):
+        """Split a point array into separate x, y and radius arrays."""
+        xs = np.array([a[0][0] for a in point_array])
+        ys = np.array([a[0][1] for a in point_array])
+        rs = np.array([a[0][2] for a in point_array])
+        return xs, ys, rs
+
+    @staticmethod
+    def _with_radii(point_array, radii):
+        return [((a[0][0], a[0][1], r), a[1]) for a, r in zip(point_array, radii)]
+
+    def _has_overlaps(self, point_array):
+        """Whether any two points of the array overlap, checked all at once."""
+        if len(point_array) < 2:
+            return False
+        xs, ys, rs = self._as_arrays(point_array)
+        i, j = np.triu_indices(len(point_array), 1)
+        dist = np.sqrt((xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2)
+        return bool(np.any(dist <= rs[i] + rs[j] + self.point_sep))
+
     @staticmethod
     def _increase_radius(point, increase=1):
         return (point[0][0], point[0][1], point[0][2] + increase), point[1]
@@ -160,23 +304,44 @@ class DotsCore:
         return (point[0][0], point[0][1], new_radius), point[1]
 
     def equalize_areas(self, point_array):
+        _, _, radii = self._as_arrays(point_array)
+        colours = np.array([a[1] for a in point_array])
+
+        # All dots of a colour grow by the same number of pixels k, so the area
+        # of a colour, sum_i pi * (r_i + k)^2, only depends on its dot count and
+        # on the sums of its radii and squared radii
+        increase = {"colour_1": 0, "colour_2": 0}
+        moments = {}
+        for colour in increase:
+            r = radii[colours == colour]
+            moments[colour] = (len(r), r.sum().item(), (r ** 2).sum().item())
+
+        def area(colour):
+            n, sum_r, sum_r2 = moments[colour]
+            k = increase[colour]
+            return np.pi * (sum_r2 + 2 * k * sum_r + n * k ** 2)
 
         # Who is big and who is small
-        small, big_area, small_area = self._get_areas(point_array)
+        colour_1_area, colour_2_area = area("colour_1"), area("colour_2")
 
         # Make all points in small area bigger to match bigger area
         # This brings us to this problem: solve a = sum_i^n (x_i^2 + 2r_i*x_i),
         # which is not solvable analytically. Therefore, what we'll do is add
         # pixel after pixel to all points until we are close to the target value
-        while not self._check_areas_equal(big_area, small_area):
-            point_array = [self._increase_radius(a) if a[1] == small else a for a in point_array]
+        while not self._check_areas_equal(max(colour_1_area, colour_2_area),
+                                          min(colour_1_area, colour_2_area)):
+            small = "colour_2" if colour_1_area > colour_2_area else "colour_1"
+            increase[small] += 1
             # Recompute areas after adjustment
-            small, big_area, small_area = self._get_areas(point_array)
+            colour_1_area, colour_2_area = area("colour_1"), area("colour_2")
+
+        for colour, k in increase.items():
+            radii[colours == colour] += k
+        point_array = self._with_radii(point_array, radii.tolist())
 
         # Recheck that we haven't created any overlap
-        for pair in itertools.combinations(point_array, 2):
-            if not self._check_points_not_overlapping(pair[0][0], pair[1][0]):
-                raise PointLayoutError("Overlapping points created")
+        if self._has_overlaps(point_array):
+            raise PointLayoutError("Overlapping points created")
 
         return point_array
 
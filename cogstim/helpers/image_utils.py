@@ -5,9 +5,124 @@ Image utility classes for the cogstim package.
 This module provides a wrapper over PIL Image operations to centralize
 all image creation and drawing functionality. 
 """
+import io
+import struct
+import zlib
+
+import numpy as np
 from PIL import Image, ImageDraw
 
 
+# PNG colour types of the 8-bit image modes written by encode_png
+_PNG_COLOUR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Netpbm magic numbers of the image modes written by encode_ppm
+_PPM_MAGIC = {"L": b"P5", "RGB": b"P6"}
+
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def encode_png(img, compress_level=1):
+    """Encode an 8-bit L, RGB or RGBA PIL image as PNG, without row filters.
+
+    Pillow chooses a filter for every row, which dominates encoding time for
+    flat synthetic stimuli. Plain zlib compresses them almost as well (a few
+    percent larger files) in less than half the time.
+
+    Args:
+        img: PIL Image in mode "L", "RGB" or "RGBA"
+        compress_level: zlib compression level (0-9)
+
+    Returns:
+        bytes: The PNG file contents
+    """
+    width, height = img.size
+    pixels = np.asarray(img).reshape(height, -1)
+    rows = np.empty((height, pixels.shape[1] + 1), dtype=np.uint8)
+    rows[:, 0] = 0  # Filter type "None" for every row
+    rows[:, 1:] = pixels
+
+    header = struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOUR_TYPES[img.mode], 0, 0, 0)
+    return b"".join([
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compress_level)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+def encode_ppm(img):
+    """Encode an 8-bit L or RGB PIL image as binary PGM/PPM.
+
+    Netpbm files are an ASCII header followed by the raw pixel buffer, so
+    they cost no compression time at all, at the price of larger files.
+
+    Args:
+        img: PIL Image in mode "L" or "RGB"
+
+    Returns:
+        bytes: The PGM ("L") or PPM ("RGB") file contents
+    """
+    width, height = img.size
+    return b"%s\n%d %d\n255\n" % (_PPM_MAGIC[img.mode], width, height) + img.tobytes()
+
+
+def _encode_fast(img, save_kwargs):
+    """Return the image encoded by encode_png/encode_ppm, or None if Pillow is needed."""
+    img_format = save_kwargs.get("format")
+    if img_format == "PNG" and img.mode in _PNG_COLOUR_TYPES:
+        return encode_png(img, save_kwargs.get("compress_level", 1))
+    if img_format == "PPM" and img.mode in _PPM_MAGIC:
+        return encode_ppm(img)
+    return None
+
+
+def encode_image(img, **save_kwargs):
+    """Encode a PIL image in memory, as save_image_file would write it.
+
+    Args:
+        img: PIL Image to encode
+        **save_kwargs: Arguments passed to PIL Image.save(); must include format
+
+    Returns:
+        bytes: The encoded file contents
+    """
+    data = _encode_fast(img, save_kwargs)
+    if data is not None:
+        return data
+    buffer = io.BytesIO()
+    img.save(buffer, **save_kwargs)
+    return buffer.getvalue()
+
+
+def save_image_file(img, path, **save_kwargs):
+    """Save a PIL image, using encode_png/encode_ppm for 8-bit PNG and PPM output.
+
+    Args:
+        img: PIL Image to save
+        path: Destination file path
+        **save_kwargs: Arguments passed to PIL Image.save()
+    """
+    data = _encode_fast(img, save_kwargs)
+    if data is not None:
+        write_encoded_file(data, path)
+    else:
+        img.save(path, **save_kwargs)
+
+
+def write_encoded_file(data, path):
+    """Write an image encoded by encode_image to a file.
+
+    Args:
+        data: Encoded image file contents
+        path: Destination file path
+    """
+    with open(path, "wb") as f:
+        f.write(data)
+
+
 class ImageCanvas:
     """Wrapper class for PIL Image and ImageDraw operations.
     
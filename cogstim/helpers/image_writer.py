@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Background image writers.
+
+This module provides writers that encode and save images on a separate
+thread, so that image generation does not wait for compression and disk I/O,
+either as individual files or bundled into a single tar archive.
+"""
+
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+
+from cogstim.helpers.image_utils import encode_image, save_image_file, write_encoded_file
+
+
+class BackgroundImageWriter:
+    """
+    Save images on a background thread.
+
+    Images are handed over through a bounded queue: when the writer falls
+    behind, ``write`` blocks instead of letting pending images pile up in
+    memory. Images must not be modified after being passed to ``write``.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        """
+        Start the writer thread.
+
+        Args:
+            maxsize: Maximum number of images waiting to be saved
+        """
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # After a failure, keep draining the queue without saving so that
+            # producers blocked on a full queue can make progress.
+            if self._error is not None:
+                continue
+            try:
+                self._save(*item)
+            except Exception as e:
+                self._error = e
+
+    def _save(self, img, path, save_kwargs):
+        if isinstance(img, bytes):
+            write_encoded_file(img, path)
+        else:
+            save_image_file(img, path, **save_kwargs)
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, img, path: str, **save_kwargs):
+        """
+        Queue a PIL image to be saved.
+
+        Args:
+            img: PIL Image to save
+            path: Destination file path
+            **save_kwargs: Arguments passed to save_image_file()
+
+        Raises:
+            Exception: The error of a previous save that failed.
+        """
+        self._raise_if_failed()
+        self._queue.put((img, path, save_kwargs))
+
+    def write_encoded(self, data: bytes, path: str):
+        """
+        Queue an already encoded image (see encode_image) to be saved.
+
+        Args:
+            data: Encoded image file contents
+            path: Destination file path
+
+        Raises:
+            Exception: The error of a previous save that failed.
+        """
+        self._raise_if_failed()
+        self._queue.put((data, path, None))
+
+    def close(self):
+        """
+        Wait until all queued images are saved and stop the thread.
+
+        Raises:
+            Exception: The first error raised while saving, if any.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_if_failed()
+
+
+class TarImageWriter(BackgroundImageWriter):
+    """
+    Add images to a single tar archive on a background thread.
+
+    Writing one sequential archive avoids creating a file per image, which is
+    slow on network filesystems. Members are named after the path each image
+    would have been saved to, relative to ``root`` (e.g.
+    ``train/yellow/img_3_5_0.png``).
+    """
+
+    def __init__(self, archive_path: str, root: str, maxsize: int = 64):
+        """
+        Create the archive and start the writer thread.
+
+        Args:
+            archive_path: Path of the tar archive to create
+            root: Directory that member names are made relative to
+            maxsize: Maximum number of images waiting to be saved
+        """
+        self._tar = tarfile.open(archive_path, "w")
+        self._root = root
+        super().__init__(maxsize=maxsize)
+
+    def _save(self, img, path, save_kwargs):
+        data = img if isinstance(img, bytes) else encode_image(img, **save_kwargs)
+        info = tarfile.TarInfo(os.path.relpath(path, self._root))
+        info.size = len(data)
+        info.mtime = time.time()
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        """
+        Wait until all queued images are archived and close the archive.
+
+        Raises:
+            Exception: The first error raised while saving, if any.
+        """
+        try:
+            super().close()
+        finally:
+            self._tar.close()
+
+
+class EncodedImageBuffer:
+    """
+    Collect encoded images in memory instead of saving them.
+
+    Used by worker processes, which cannot write to the parent's archive:
+    they encode their images and hand them back to be archived.
+    """
+
+    def __init__(self):
+        self._items = []
+
+    def write(self, img, path: str, **save_kwargs):
+        """Encode a PIL image and keep it with its destination path."""
+        self._items.append((encode_image(img, **save_kwargs), path))
+
+    def write_encoded(self, data: bytes, path: str):
+        """Keep an already encoded image with its destination path."""
+        self._items.append((data, path))
+
+    def drain(self) -> list:
+        """Return the (data, path) pairs collected so far and forget them."""
+        items, self._items = self._items, []
+        return items
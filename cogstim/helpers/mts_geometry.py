@@ -2,6 +2,38 @@
 from cogstim.helpers.dots_core import DotsCore, PointLayoutError
 
 
+# Number of distinct symmetries of the square canvas (see transform_points)
+NUM_SYMMETRIES = 8
+
+
+def transform_points(points, size: int, index: int):
+    """
+    Apply one of the 8 rotations/reflections of a square canvas to a layout.
+
+    Distances between dots are preserved and the canvas maps onto itself, so a
+    valid layout stays valid. Index 0 is the identity.
+
+    Args:
+        points: List of ((x, y, radius), colour) tuples
+        size: Canvas side length in pixels
+        index: Symmetry index in [0, NUM_SYMMETRIES)
+
+    Returns:
+        The transformed list of points.
+    """
+    flip_x, flip_y, transpose = index & 1, index & 2, index & 4
+    out = []
+    for (x, y, r), colour in points:
+        if flip_x:
+            x = size - x
+        if flip_y:
+            y = size - y
+        if transpose:
+            x, y = y, x
+        out.append(((x, y, r), colour))
+    return out
+
+
 def equalize_pair(
     s_np: DotsCore,
     s_points,
@@ -51,19 +83,20 @@ def equalize_pair(
         if diff <= abs_tolerance or diff <= rel_tolerance * denom:
             return True, s_points, m_points
 
+        # Only the grown set changes, so only its area is recomputed
         if area_s < area_m:
             candidate = s_np.increase_all_radii(s_points, 1)
             if not s_np.validate_layout(candidate):
                 return False, s_points, m_points
             s_points = candidate
+            area_s = s_np.compute_area(s_points, "colour_1")
         else:
             candidate = m_np.increase_all_radii(m_points, 1)
             if not m_np.validate_layout(candidate):
                 return False, s_points, m_points
             m_points = candidate
+            area_m = m_np.compute_area(m_points, "colour_1")
 
-        area_s = s_np.compute_area(s_points, "colour_1")
-        area_m = m_np.compute_area(m_points, "colour_1")
         iterations += 1
         if iterations >= attempts_limit:
             return False, s_points, m_points
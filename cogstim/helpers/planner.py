@@ -6,13 +6,30 @@ replacing the previously duplicated logic in different generators.
 """
 
 import csv
+import itertools
+from fractions import Fraction
 from pathlib import Path
 from typing import List, Tuple, Dict, Any, Optional
 
+import numpy as np
+
+from cogstim.helpers.constants import CSV_BUFFER_SIZE
+
+
+# Equalization settings generated for each ANS variants option
+ANS_VARIANTS = {
+    "all": (False, True),
+    "raw": (False,),
+    "equalized": (True,),
+}
+
 
 class GenerationTask:
     """Represents a single generation task with all parameters needed."""
     
+    # Plans hold one task per image; slots keep them small
+    __slots__ = ("task_type", "rep", "params")
+    
     def __init__(self, task_type: str, rep: int = 0, **params):
         """
         Initialize a generation task with flexible parameters.
@@ -60,6 +77,7 @@ class GenerationPlan:
                  max_point_num: int = 0, 
                  num_repeats: int = 1,
                  ratios: Optional[List[float]] = None,
+                 variants: str = "all",
                  # Shapes-specific params
                  shapes: Optional[List[str]] = None,
                  colors: Optional[List[str]] = None,
@@ -79,6 +97,8 @@ class GenerationPlan:
             max_point_num: Maximum number of points (for ans/mts/one_colour)
             num_repeats: Number of repetitions per combination
             ratios: List of ratios for ANS/MTS tasks
+            variants: Which ANS variants to generate: 'all' (default), 'raw'
+                (non-equalized only) or 'equalized' (equalized only)
             shapes: List of shape names (for shapes tasks)
             colors: List of color names (for shapes tasks)
             min_surface: Minimum surface area (for shapes tasks)
@@ -93,6 +113,11 @@ class GenerationPlan:
         self.max_point_num = max_point_num
         self.num_repeats = num_repeats
         self.ratios = ratios if ratios is not None else []
+        if variants not in ANS_VARIANTS:
+            raise ValueError(
+                f"Invalid variants: {variants}. Must be one of {list(ANS_VARIANTS)}"
+            )
+        self.variants = variants
         # Shapes params
         self.shapes = shapes or []
         self.colors = colors or []
@@ -119,39 +144,49 @@ class GenerationPlan:
             # For one-colour, we just need single counts
             return [(a, 0) for a in range(self.min_point_num, self.max_point_num + 1)]
         
-        positions = []
-        for a in range(self.min_point_num, self.max_point_num + 1):
-            for ratio in self.ratios:
-                b = a / ratio
-                if b.is_integer():
-                    b = int(b)
-                    if b >= self.min_point_num and b <= self.max_point_num and b != a:
-                        positions.append((a, b))
+        # Ratios are exact fractions num/den, so b = a / ratio = a * den / num
+        # can be tested for every (count, ratio) combination in integers,
+        # without float rounding (e.g. 15 / (3/11) == 55.00000000000001)
+        fractions = [Fraction(r).limit_denominator(1000) for r in self.ratios]
+        num = np.array([f.numerator for f in fractions])[None, :]
+        den = np.array([f.denominator for f in fractions])[None, :]
+        a = np.arange(self.min_point_num, self.max_point_num + 1)[:, None]
+        b, remainder = np.divmod(a * den, num)
+        valid = (
+            (remainder == 0)
+            & (b >= self.min_point_num)
+            & (b <= self.max_point_num)
+            & (b != a)
+        )
+        a = np.broadcast_to(a, b.shape)[valid]
+        b = b[valid]
         
         # Return sorted unique pairs (smallest first)
-        return sorted({tuple(sorted(pair)) for pair in positions})
+        pairs = zip(np.minimum(a, b).tolist(), np.maximum(a, b).tolist())
+        return sorted(set(pairs))
     
     def expand_ans_tasks(self, n: int, m: int, rep: int) -> None:
         """
         Expand ANS two-colour tasks for a given (n, m) pair.
         
-        Generates 4 variants:
+        Generates up to 4 variants:
         - (n, m) non-equalized
         - (m, n) non-equalized (order swap)
         - (n, m) equalized
         - (m, n) equalized (order swap)
         
+        With variants='raw' or 'equalized', only the matching half is generated.
+        
         Args:
             n: First point count
             m: Second point count
             rep: Repetition number
         """
-        # Non-equalized orders
-        self.tasks.append(GenerationTask("ans", rep, n1=n, n2=m, equalize=False))
-        self.tasks.append(GenerationTask("ans", rep, n1=m, n2=n, equalize=False))
-        # Equalized orders
-        self.tasks.append(GenerationTask("ans", rep, n1=n, n2=m, equalize=True))
-        self.tasks.append(GenerationTask("ans", rep, n1=m, n2=n, equalize=True))
+        self.tasks.extend(
+            GenerationTask("ans", rep, n1=n1, n2=n2, equalize=equalize)
+            for equalize in ANS_VARIANTS[self.variants]
+            for n1, n2 in ((n, m), (m, n))
+        )
     
     def expand_mts_tasks(self, n: int, m: int, rep: int) -> None:
         """
@@ -166,14 +201,14 @@ class GenerationPlan:
             m: Second point count
             rep: Repetition number
         """
-        self.tasks.append(GenerationTask("mts", rep, n1=n, n2=m, equalize=False))
-        self.tasks.append(GenerationTask("mts", rep, n1=m, n2=n, equalize=False))
-        self.tasks.append(GenerationTask("mts", rep, n1=n, n2=m, equalize=True))
-        self.tasks.append(GenerationTask("mts", rep, n1=m, n2=n, equalize=True))
-        self.tasks.append(GenerationTask("mts", rep, n1=n, n2=n, equalize=True))
-        self.tasks.append(GenerationTask("mts", rep, n1=n, n2=n, equalize=False))
-        self.tasks.append(GenerationTask("mts", rep, n1=m, n2=m, equalize=True))
-        self.tasks.append(GenerationTask("mts", rep, n1=m, n2=m, equalize=False))
+        variants = (
+            (n, m, False), (m, n, False), (n, m, True), (m, n, True),
+            (n, n, True), (n, n, False), (m, m, True), (m, m, False),
+        )
+        self.tasks.extend(
+            GenerationTask("mts", rep, n1=n1, n2=n2, equalize=equalize)
+            for n1, n2, equalize in variants
+        )
     
     def expand_one_colour_tasks(self, n: int, rep: int) -> None:
         """
@@ -193,26 +228,22 @@ class GenerationPlan:
             task_subtype: 'two_shapes', 'two_colors', or 'custom'
             rep: Repetition number
         """
-        for surface in range(self.min_surface, self.max_surface, self.surface_step):
-            if task_subtype == "two_shapes":
-                # Each shape in one color
-                for shape in self.shapes:
-                    self.tasks.append(GenerationTask("shapes", rep, 
-                                                    shape=shape, color=self.colors[0], 
-                                                    surface=surface, task_subtype=task_subtype))
-            elif task_subtype == "two_colors":
-                # One shape in each color
-                for color in self.colors:
-                    self.tasks.append(GenerationTask("shapes", rep,
-                                                    shape=self.shapes[0], color=color,
-                                                    surface=surface, task_subtype=task_subtype))
-            else:  # custom
-                # Each shape-color combination
-                for shape in self.shapes:
-                    for color in self.colors:
-                        self.tasks.append(GenerationTask("shapes", rep,
-                                                        shape=shape, color=color,
-                                                        surface=surface, task_subtype=task_subtype))
+        if task_subtype == "two_shapes":
+            # Each shape in one color
+            combinations = [(shape, self.colors[0]) for shape in self.shapes]
+        elif task_subtype == "two_colors":
+            # One shape in each color
+            combinations = [(self.shapes[0], color) for color in self.colors]
+        else:  # custom
+            # Each shape-color combination
+            combinations = list(itertools.product(self.shapes, self.colors))
+        
+        self.tasks.extend(
+            GenerationTask("shapes", rep, shape=shape, color=color,
+                           surface=surface, task_subtype=task_subtype)
+            for surface in range(self.min_surface, self.max_surface, self.surface_step)
+            for shape, color in combinations
+        )
     
     def expand_lines_tasks(self, rep: int) -> None:
         """
@@ -239,17 +270,15 @@ class GenerationPlan:
         if self.task_type in ["ans", "mts", "one_colour"]:
             # Point-based tasks use positions from ratios
             positions = self.compute_positions()
+            expand = {
+                "ans": self.expand_ans_tasks,
+                "mts": self.expand_mts_tasks,
+                "one_colour": lambda n, _, rep: self.expand_one_colour_tasks(n, rep),
+            }[self.task_type]
             
             for rep in range(self.num_repeats):
-                if self.task_type == "one_colour":
-                    for (n, _) in positions:
-                        self.expand_one_colour_tasks(n, rep)
-                elif self.task_type == "ans":
-                    for (n, m) in positions:
-                        self.expand_ans_tasks(n, m, rep)
-                elif self.task_type == "mts":
-                    for (n, m) in positions:
-                        self.expand_mts_tasks(n, m, rep)
+                for (n, m) in positions:
+                    expand(n, m, rep)
         
         elif self.task_type == "shapes":
             # Shapes tasks iterate over surfaces and shapes/colors
@@ -381,7 +410,7 @@ class GenerationPlan:
         os.makedirs(output_dir, exist_ok=True)
         target_path = os.path.join(output_dir, filename)
         
-        with open(target_path, mode="w", newline="", encoding="utf-8") as f:
+        with open(target_path, mode="w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
             # Get all unique keys from task params
             if self.tasks:
                 all_keys = set()
@@ -471,7 +500,7 @@ def resolve_ratios(ratios, easy_ratios: List[float], hard_ratios: List[float]) -
         hard_ratios: List of hard ratios (used if ratios is a string)
     
     Returns:
-        List of ratios
+        List of unique ratios, in order of first appearance
     
     Raises:
         ValueError: If string mode is invalid
@@ -479,12 +508,12 @@ def resolve_ratios(ratios, easy_ratios: List[float], hard_ratios: List[float]) -
     """
     if isinstance(ratios, str):
         if ratios == "easy":
-            return list(easy_ratios)
+            ratios = easy_ratios
         elif ratios == "hard":
-            return list(hard_ratios)
+            ratios = hard_ratios
         elif ratios == "all":
-            return list(easy_ratios) + list(hard_ratios)
+            ratios = [*easy_ratios, *hard_ratios]
         else:
             raise ValueError(f"Invalid ratio mode: {ratios}")
-    else:
-        return list(ratios)
+    # A repeated ratio would only produce the same positions again
+    return list(dict.fromkeys(ratios))
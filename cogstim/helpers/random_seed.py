@@ -35,3 +35,23 @@ def set_seed(seed: Optional[int]) -> None:
     if seed is not None:
         random.seed(seed)
         np.random.seed(seed)
+
+
+def derive_seed(seed: Optional[int], *keys: int) -> Optional[int]:
+    """Derive an independent, reproducible seed for a sub-task.
+
+    Used to seed work that runs outside the main process (e.g. worker
+    processes), where sharing the global random state is not possible.
+    The same ``seed`` and ``keys`` always give the same derived seed.
+
+    Args:
+        seed: Base random seed. If None, None is returned (random behavior).
+        *keys: Non-negative integers identifying the sub-task.
+
+    Returns:
+        A 32-bit integer seed, or None if no base seed was given.
+    """
+    if seed is None:
+        return None
+    sequence = np.random.SeedSequence(seed, spawn_key=keys)
+    return int(sequence.generate_state(1)[0])
@@ -9,6 +9,8 @@ generated image pairs and other generation metadata.
 import os
 import csv
 
+from cogstim.helpers.constants import CSV_BUFFER_SIZE
+
 
 class SummaryWriter:
     """
@@ -64,7 +66,7 @@ class SummaryWriter:
             return
         os.makedirs(self.output_dir, exist_ok=True)
         target_path = os.path.join(self.output_dir, filename)
-        with open(target_path, mode="w", newline="", encoding="utf-8") as f:
+        with open(target_path, mode="w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
             writer = csv.writer(f)
             writer.writerow([
                 "num1",
@@ -9,10 +9,13 @@ Runs minimal examples for each subcommand and verifies:
 This ensures docs examples stay in sync with the actual CLI behavior.
 """
 
+import os
 import sys
 import shutil
 import subprocess
 import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -36,32 +39,35 @@ COGSTIM_CMD = get_cogstim_command()
 
 
 def run_command(cmd: list[str], desc: str) -> bool:
-    """Run a command and return success status."""
-    print(f"\n{'=' * 60}")
-    print(f"Testing: {desc}")
-    print(f"Command: {' '.join(cmd)}")
-    print('=' * 60)
+    """Run a command and return success status.
     
+    Output is captured and only shown for failing commands; each report is
+    printed in one call so that concurrent tests do not interleave it.
+    """
+    header = (
+        f"\n{'=' * 60}\n"
+        f"Testing: {desc}\n"
+        f"Command: {' '.join(cmd)}\n"
+        f"{'=' * 60}"
+    )
     try:
-        result = subprocess.run(
+        subprocess.run(
             cmd,
             check=True,
             capture_output=True,
             text=True,
             timeout=120
         )
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-        print(f"✓ {desc} succeeded")
+        print(f"{header}\n✓ {desc} succeeded")
         return True
     except subprocess.CalledProcessError as e:
-        print(f"✗ {desc} failed with exit code {e.returncode}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
+        print(
+            f"{header}\n✗ {desc} failed with exit code {e.returncode}\n"
+            f"STDOUT: {e.stdout}\nSTDERR: {e.stderr}"
+        )
         return False
     except subprocess.TimeoutExpired:
-        print(f"✗ {desc} timed out")
+        print(f"{header}\n✗ {desc} timed out")
         return False
 
 
@@ -82,12 +88,12 @@ def verify_output(output_dir: Path, task: str, expected_dirs: list[str]) -> bool
             continue
         
         # Check if directory contains files (not just empty)
-        files = list(dir_path.rglob("*.png"))
-        if not files:
+        n_files = sum(1 for _ in dir_path.rglob("*.png"))
+        if not n_files:
             print(f"✗ Directory {dir_path} contains no PNG files")
             all_good = False
         else:
-            print(f"✓ {dir_path} contains {len(files)} PNG files")
+            print(f"✓ {dir_path} contains {n_files} PNG files")
     
     return all_good
 
@@ -325,15 +331,19 @@ def main():
             ("custom", test_custom),
         ]
         
-        results = {}
-        for name, test_func in tests:
+        # Each test runs its own cogstim subprocess into its own subdirectory,
+        # so they can run side by side
+        def run_test(name, test_func):
             try:
-                results[name] = test_func(temp_path)
+                return test_func(temp_path)
             except Exception as e:
                 print(f"\n✗ Test '{name}' raised an exception: {e}")
-                import traceback
                 traceback.print_exc()
-                results[name] = False
+                return False
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = {name: executor.submit(run_test, name, test_func) for name, test_func in tests}
+            results = {name: future.result() for name, future in futures.items()}
         
         # Print summary
         print("\n" + "=" * 60)
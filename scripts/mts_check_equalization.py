@@ -2,6 +2,8 @@ import argparse
 import csv
 from pathlib import Path
 
+import numpy as np
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Check MTS equalization differences from CSV produced by mts_area_report.py")
@@ -38,28 +40,28 @@ def main() -> None:
     eq_rows = [r for r in rows if r[3]]
     neq_rows = [r for r in rows if not r[3]]
 
-    def rel_diff(a: int, b: int) -> float:
-        denom = max(a, b, 1)
-        return abs(a - b) / denom
-
     # Equalized stats
-    eq_diffs_abs = [abs(r[4] - r[5]) for r in eq_rows]
-    eq_diffs_rel = [rel_diff(r[4], r[5]) for r in eq_rows]
+    eq_s_area = np.array([r[4] for r in eq_rows], dtype=np.int64)
+    eq_m_area = np.array([r[5] for r in eq_rows], dtype=np.int64)
+    eq_diffs_abs = np.abs(eq_s_area - eq_m_area)
+    eq_diffs_rel = eq_diffs_abs / np.maximum(np.maximum(eq_s_area, eq_m_area), 1)
 
-    eq_within = [i for i, (ad, rd) in enumerate(zip(eq_diffs_abs, eq_diffs_rel)) if ad <= args.abs_tol or rd <= args.rel_tol]
-    eq_mismatch = [i for i, (ad, rd) in enumerate(zip(eq_diffs_abs, eq_diffs_rel)) if not (ad <= args.abs_tol or rd <= args.rel_tol)]
+    within = (eq_diffs_abs <= args.abs_tol) | (eq_diffs_rel <= args.rel_tol)
+    eq_mismatch = np.flatnonzero(~within)
 
     print(f"Total rows: {total}")
     print(f"Equalized rows: {len(eq_rows)}  |  Non-equalized rows: {len(neq_rows)}")
     if eq_rows:
+        n_within = int(np.count_nonzero(within))
         print("Equalized summary (abs px | rel):")
-        print(f"  mean: {sum(eq_diffs_abs)/len(eq_diffs_abs):.3f} | {sum(eq_diffs_rel)/len(eq_diffs_rel):.6f}")
-        print(f"  max : {max(eq_diffs_abs)} | {max(eq_diffs_rel):.6f}")
-        print(f"  within tol: {len(eq_within)}/{len(eq_rows)}  ({100.0*len(eq_within)/len(eq_rows):.1f}%)")
-
-    # Show worst mismatches
-    if eq_mismatch:
-        worst = sorted(eq_mismatch, key=lambda i: (eq_diffs_abs[i], eq_diffs_rel[i]), reverse=True)[: args.show]
+        print(f"  mean: {eq_diffs_abs.mean():.3f} | {eq_diffs_rel.mean():.6f}")
+        print(f"  max : {eq_diffs_abs.max()} | {eq_diffs_rel.max():.6f}")
+        print(f"  within tol: {n_within}/{len(eq_rows)}  ({100.0*n_within/len(eq_rows):.1f}%)")
+
+    # Show worst mismatches: by abs then rel diff, descending; ties keep CSV order
+    if eq_mismatch.size:
+        order = np.lexsort((eq_mismatch, -eq_diffs_rel[eq_mismatch], -eq_diffs_abs[eq_mismatch]))
+        worst = eq_mismatch[order][: args.show]
         print(f"\nTop {len(worst)} equalized mismatches (abs px, rel, base, n, m, s_area, m_area):")
         for i in worst:
             base, n, m, _, sa, ma, *_ = eq_rows[i]
@@ -67,9 +69,9 @@ def main() -> None:
 
     # Optional removal of out-of-tolerance equalized pairs based on relative threshold
     if args.remove_over_rel is not None:
-        to_remove = [i for i, rd in enumerate(eq_diffs_rel) if rd > args.remove_over_rel]
+        to_remove = np.flatnonzero(eq_diffs_rel > args.remove_over_rel)
         print(f"\nFlagged for removal (equalized, rel diff > {args.remove_over_rel}): {len(to_remove)}")
-        if to_remove:
+        if to_remove.size:
             # Show up to N examples
             sample = to_remove[: args.show]
             print("Examples to remove (rel, base):")
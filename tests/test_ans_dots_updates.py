@@ -4,10 +4,23 @@ import pytest
 from unittest.mock import patch, MagicMock, call
 
 from cogstim.generators.dots_ans import DotsANSGenerator, GENERAL_CONFIG, TerminalPointLayoutError
+from cogstim.helpers.dots_core import DotsCore
 from cogstim.helpers.constants import ANS_EASY_RATIOS, ANS_HARD_RATIOS
 from cogstim.helpers.planner import GenerationPlan, load_ans_tasks_from_csv
 
 
+@pytest.fixture
+def mock_dots_core():
+    """Replace DotsCore in dots_ans by an autospecced mock; yields the instance mock."""
+    with patch('cogstim.generators.dots_ans.DotsCore', autospec=True) as mock_cls:
+        core = mock_cls.return_value
+        core.boundary_width = DotsCore.boundary_width
+        core.design_n_points.return_value = []
+        core.equalize_areas.return_value = []
+        core.draw_points.return_value = MagicMock()
+        yield core
+
+
 class TestPointsGeneratorRatiosMode:
     """Test the new ratios functionality in DotsANSGenerator."""
 
@@ -69,26 +82,6 @@ class TestPointsGeneratorRatiosMode:
             expected_ratios = ANS_EASY_RATIOS + ANS_HARD_RATIOS
             assert generator.ratios == expected_ratios
 
-    def test_ratios_all(self):
-        """Test that ratios='all' uses both easy and hard ratios."""
-        config = {
-            **GENERAL_CONFIG,
-            "train_num": 1,
-            "test_num": 1,
-            "output_dir": "/tmp/test",
-            "ratios": "all",
-            "ONE_COLOUR": False,
-            "min_point_num": 1,
-            "max_point_num": 10,
-            "version_tag": "",
-            "img_format": "png",
-        }
-
-        with patch('cogstim.generators.dots_ans.os.makedirs'):
-            generator = DotsANSGenerator(config)
-            expected_ratios = ANS_EASY_RATIOS + ANS_HARD_RATIOS
-            assert generator.ratios == expected_ratios
-
     def test_ratios_invalid_raises_error(self):
         """Test that invalid ratios raises ValueError."""
         config = {
@@ -234,7 +227,35 @@ class TestPointsGeneratorErrorHandling:
                 with pytest.raises(TerminalPointLayoutError):
                     generator.create_and_save(1, 0, False, "test")
 
-    def test_create_image_one_colour_mode(self):
+    @pytest.mark.parametrize("layout", ["mixed", "separated"])
+    def test_impossible_density_fails_fast(self, layout):
+        """Test that pairs too dense for random placement are rejected upfront."""
+        config = {
+            **GENERAL_CONFIG,
+            "train_num": 1,
+            "test_num": 0,
+            "output_dir": "/tmp/test",
+            "ratios": "easy",
+            "ONE_COLOUR": False,
+            "min_point_num": 1,
+            "max_point_num": 60,
+            "version_tag": "",
+            "img_format": "png",
+            "layout": layout,
+        }
+
+        with patch('cogstim.generators.dots_ans.os.makedirs'):
+            generator = DotsANSGenerator(config)
+
+        with patch.object(generator, 'create_and_save_once') as mock_once:
+            with pytest.raises(TerminalPointLayoutError, match="random placement"):
+                generator.create_and_save(30, 60, False, "train")
+            mock_once.assert_not_called()
+
+            generator.create_and_save(3, 5, False, "train")
+            mock_once.assert_called_once()
+
+    def test_create_image_one_colour_mode(self, mock_dots_core):
         """Test create_image method in one-colour mode."""
         config = {
             **GENERAL_CONFIG,
@@ -252,22 +273,15 @@ class TestPointsGeneratorErrorHandling:
         
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
-            
-            # Mock DotsCore
-            with patch('cogstim.generators.dots_ans.DotsCore') as mock_create:
-                mock_np = MagicMock()
-                mock_create.return_value = mock_np
-                mock_np.design_n_points.return_value = []
-                mock_np.draw_points.return_value = MagicMock()
-                
-                result = generator.create_image(2, 0, False)
-                
-                # Should call design_n_points twice (once for each colour, even in one-colour mode)
-                assert mock_np.design_n_points.call_count == 2
-                # Should not call equalize_areas in one-colour mode
-                mock_np.equalize_areas.assert_not_called()
-
-    def test_create_image_two_colour_mode_equalized(self):
+
+        generator.create_image(2, 0, False)
+
+        # Should call design_n_points twice (once for each colour, even in one-colour mode)
+        assert mock_dots_core.design_n_points.call_count == 2
+        # Should not call equalize_areas in one-colour mode
+        mock_dots_core.equalize_areas.assert_not_called()
+
+    def test_create_image_two_colour_mode_equalized(self, mock_dots_core):
         """Test create_image method in two-colour mode with equalization."""
         config = {
             **GENERAL_CONFIG,
@@ -286,21 +300,13 @@ class TestPointsGeneratorErrorHandling:
         
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
-            
-            # Mock DotsCore
-            with patch('cogstim.generators.dots_ans.DotsCore') as mock_create:
-                mock_np = MagicMock()
-                mock_create.return_value = mock_np
-                mock_np.design_n_points.return_value = []
-                mock_np.equalize_areas.return_value = []
-                mock_np.draw_points.return_value = MagicMock()
-                
-                result = generator.create_image(2, 3, True)
-                
-                # Should call design_n_points twice for both colours
-                assert mock_np.design_n_points.call_count == 2
-                # Should call equalize_areas when equalized=True
-                mock_np.equalize_areas.assert_called_once()
+
+        generator.create_image(2, 3, True)
+
+        # Should call design_n_points twice for both colours
+        assert mock_dots_core.design_n_points.call_count == 2
+        # Should call equalize_areas when equalized=True
+        mock_dots_core.equalize_areas.assert_called_once()
 
 
 class TestPointsGeneratorDirectorySetup:
@@ -383,45 +389,30 @@ class TestSeparatedLayout:
         cfg.update(overrides)
         return cfg
 
-    def test_create_image_separated_calls_design_with_regions(self):
+    def test_create_image_separated_calls_design_with_regions(self, mock_dots_core):
         """In separated mode, design_n_points should receive region kwargs."""
         config = self._base_config()
 
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
 
-        with patch('cogstim.generators.dots_ans.DotsCore') as MockCore:
-            mock_np = MagicMock()
-            MockCore.return_value = mock_np
-            mock_np.boundary_width = 5
-            mock_np.design_n_points.return_value = []
-            mock_np.draw_points.return_value = MagicMock()
-
-            generator.create_image(3, 5, equalized=False)
+        generator.create_image(3, 5, equalized=False)
 
-            calls = mock_np.design_n_points.call_args_list
-            assert len(calls) == 2
-            for c in calls:
-                assert "region" in c.kwargs and c.kwargs["region"] is not None
+        calls = mock_dots_core.design_n_points.call_args_list
+        assert len(calls) == 2
+        for c in calls:
+            assert "region" in c.kwargs and c.kwargs["region"] is not None
 
-    def test_create_image_separated_equalized(self):
+    def test_create_image_separated_equalized(self, mock_dots_core):
         """Equalization should be invoked in separated mode when requested."""
         config = self._base_config()
 
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
 
-        with patch('cogstim.generators.dots_ans.DotsCore') as MockCore:
-            mock_np = MagicMock()
-            MockCore.return_value = mock_np
-            mock_np.boundary_width = 5
-            mock_np.design_n_points.return_value = []
-            mock_np.equalize_areas.return_value = []
-            mock_np.draw_points.return_value = MagicMock()
-
-            generator.create_image(3, 5, equalized=True)
+        generator.create_image(3, 5, equalized=True)
 
-            mock_np.equalize_areas.assert_called_once()
+        mock_dots_core.equalize_areas.assert_called_once()
 
     def test_filename_contains_separated_tag(self):
         """Filenames should include '_separated' when layout is separated."""
@@ -447,44 +438,32 @@ class TestSeparatedLayout:
             filename_arg = mock_save.call_args[0][0]
             assert "_separated" not in filename_arg
 
-    def test_mixed_layout_does_not_pass_regions(self):
+    def test_mixed_layout_does_not_pass_regions(self, mock_dots_core):
         """Mixed mode should use the original circular placement (no region)."""
         config = self._base_config(layout="mixed")
 
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
 
-        with patch('cogstim.generators.dots_ans.DotsCore') as MockCore:
-            mock_np = MagicMock()
-            MockCore.return_value = mock_np
-            mock_np.design_n_points.return_value = []
-            mock_np.draw_points.return_value = MagicMock()
+        generator.create_image(3, 5, equalized=False)
 
-            generator.create_image(3, 5, equalized=False)
+        calls = mock_dots_core.design_n_points.call_args_list
+        assert len(calls) == 2
+        for c in calls:
+            assert c.kwargs.get("region") is None
 
-            calls = mock_np.design_n_points.call_args_list
-            assert len(calls) == 2
-            for c in calls:
-                assert c.kwargs.get("region") is None
-
-    def test_one_colour_ignores_separated(self):
+    def test_one_colour_ignores_separated(self, mock_dots_core):
         """One-colour mode should fall back to mixed even if layout='separated'."""
         config = self._base_config(ONE_COLOUR=True)
 
         with patch('cogstim.generators.dots_ans.os.makedirs'):
             generator = DotsANSGenerator(config)
 
-        with patch('cogstim.generators.dots_ans.DotsCore') as MockCore:
-            mock_np = MagicMock()
-            MockCore.return_value = mock_np
-            mock_np.design_n_points.return_value = []
-            mock_np.draw_points.return_value = MagicMock()
-
-            generator.create_image(3, 0, equalized=False)
+        generator.create_image(3, 0, equalized=False)
 
-            calls = mock_np.design_n_points.call_args_list
-            for c in calls:
-                assert c.kwargs.get("region") is None
+        calls = mock_dots_core.design_n_points.call_args_list
+        for c in calls:
+            assert c.kwargs.get("region") is None
 
 
 class TestLoadAnsTasksFromCsv:
@@ -563,6 +542,93 @@ class TestBuildFromAnsCsv:
             GenerationPlan("mts", 1, 10, 1, ratios=[]).build_from_ans_csv(csv_path)
 
 
+class TestAnsVariants:
+    """Test restricting ANS plans to raw or equalized variants."""
+
+    def _plan(self, variants):
+        return GenerationPlan(
+            "ans", 1, 10, 1, ratios=ANS_EASY_RATIOS, variants=variants
+        ).build()
+
+    def test_all_variants_default(self):
+        plan = GenerationPlan("ans", 1, 10, 1, ratios=ANS_EASY_RATIOS).build()
+        positions = plan.compute_positions()
+        assert len(plan.tasks) == 4 * len(positions)
+
+    def test_raw_variants_only(self):
+        plan = self._plan("raw")
+        assert len(plan.tasks) == 2 * len(plan.compute_positions())
+        assert all(task.params["equalize"] is False for task in plan.tasks)
+
+    def test_equalized_variants_only(self):
+        plan = self._plan("equalized")
+        assert len(plan.tasks) == 2 * len(plan.compute_positions())
+        assert all(task.params["equalize"] is True for task in plan.tasks)
+
+    def test_invalid_variants_raises(self):
+        with pytest.raises(ValueError, match="Invalid variants"):
+            GenerationPlan("ans", 1, 10, 1, ratios=ANS_EASY_RATIOS, variants="some")
+
+
+class TestAnsReuseLayouts:
+    """Test deriving all variants of a pair from one shared layout."""
+
+    def _config(self, tmp_path, **overrides):
+        cfg = {
+            **GENERAL_CONFIG,
+            "train_num": 1,
+            "test_num": 0,
+            "output_dir": str(tmp_path),
+            "ratios": "easy",
+            "ONE_COLOUR": False,
+            "min_point_num": 2,
+            "max_point_num": 4,
+            "version_tag": "",
+            "img_format": "png",
+            "reuse_layouts": True,
+        }
+        cfg.update(overrides)
+        return cfg
+
+    def test_same_files_as_independent_sampling(self, tmp_path):
+        shared = DotsANSGenerator(self._config(tmp_path / "shared"))
+        shared.generate_images()
+        independent = DotsANSGenerator(
+            self._config(tmp_path / "independent", reuse_layouts=False)
+        )
+        independent.generate_images()
+
+        def listing(root):
+            return sorted(p.relative_to(root) for p in root.rglob("*.png"))
+
+        files = listing(tmp_path / "shared")
+        assert files
+        assert files == listing(tmp_path / "independent")
+
+    def test_groups_tasks_by_pair(self, tmp_path):
+        with patch('cogstim.generators.dots_ans.os.makedirs'):
+            generator = DotsANSGenerator(self._config(tmp_path))
+        plan = GenerationPlan("ans", 2, 4, 2, ratios=generator.ratios).build()
+        groups = generator._group_tasks_by_pair(plan.tasks)
+        assert len(groups) == 2 * len(plan.compute_positions())
+        assert all(len(group) == 4 for group in groups)
+
+    @pytest.mark.parametrize("layout", ["mixed", "separated"])
+    def test_swapped_variant_mirrors_layout(self, tmp_path, layout):
+        with patch('cogstim.generators.dots_ans.os.makedirs'):
+            generator = DotsANSGenerator(self._config(tmp_path, layout=layout))
+        layout_points = [((100, 50, 10), "colour_1"), ((400, 60, 12), "colour_2")]
+        swapped = generator._swap_colours(layout_points)
+
+        assert [colour for _, colour in swapped] == ["colour_2", "colour_1"]
+        xs = [x for (x, _, _), _ in swapped]
+        if layout == "separated":
+            size = generator._dots_kwargs["init_size"]
+            assert xs == [size - 100, size - 400]
+        else:
+            assert xs == [100, 400]
+
+
 class TestAnsGeneratorCsvIntegration:
     """Test DotsANSGenerator with CSV-driven task lists."""
 
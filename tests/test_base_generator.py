@@ -1,9 +1,11 @@
 """Tests for cogstim.helpers.base_generator module."""
 
 import os
+import tarfile
 import tempfile
+import pytest
 from unittest.mock import MagicMock, patch, call
-from PIL import Image
+from PIL import Image, ImageDraw
 
 from cogstim.helpers.base_generator import BaseGenerator
 from cogstim.helpers.image_utils import ImageCanvas
@@ -136,6 +138,74 @@ class TestBaseGeneratorSaving:
             loaded = Image.open(expected_path)
             assert loaded.format == "JPEG"
 
+    def test_save_image_png_compress_level(self):
+        """Test that PNG output uses the configured zlib level."""
+        config = {"output_dir": "/tmp/test", "img_format": "png", "png_compress_level": 3}
+        gen = BaseGenerator(config)
+        img = Image.new("RGB", (10, 10), color="red")
+
+        with patch('cogstim.helpers.base_generator.save_image_file') as mock_save:
+            gen.save_image(img, "filename")
+            assert mock_save.call_args[1]["compress_level"] == 3
+
+    @pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+    def test_save_image_png_roundtrip(self, mode):
+        """Test that unfiltered PNG output decodes to the original pixels."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("RGB", (40, 30), color="black")
+            ImageDraw.Draw(img).ellipse((5, 5, 25, 20), fill="yellow")
+            img = img.convert(mode)
+
+            gen.save_image(img, "test_img")
+
+            loaded = Image.open(os.path.join(tmpdir, "test_img.png"))
+            assert loaded.format == "PNG"
+            assert loaded.mode == mode
+            assert loaded.tobytes() == img.tobytes()
+
+    def test_save_image_png_other_modes_use_pillow(self):
+        """Test that PNG modes not handled by encode_png are saved by Pillow."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("1", (20, 20), color=1)
+
+            gen.save_image(img, "test_img")
+
+            loaded = Image.open(os.path.join(tmpdir, "test_img.png"))
+            assert loaded.mode == "1"
+            assert loaded.tobytes() == img.tobytes()
+
+    @pytest.mark.parametrize("mode", ["L", "RGB"])
+    def test_save_image_ppm_roundtrip(self, mode):
+        """Test that raw PPM/PGM output decodes to the original pixels."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "ppm"})
+            img = Image.new("RGB", (40, 30), color="black")
+            ImageDraw.Draw(img).ellipse((5, 5, 25, 20), fill="yellow")
+            img = img.convert(mode)
+
+            gen.save_image(img, "test_img")
+
+            loaded = Image.open(os.path.join(tmpdir, "test_img.ppm"))
+            assert loaded.format == "PPM"
+            assert loaded.mode == mode
+            assert loaded.tobytes() == img.tobytes()
+
+    def test_save_image_webp_format(self):
+        """Test save_image with lossless WebP format."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = {"output_dir": tmpdir, "img_format": "webp", "version_tag": ""}
+            gen = BaseGenerator(config)
+            img = Image.new("RGB", (100, 100), color="green")
+
+            gen.save_image(img, "test_img")
+
+            expected_path = os.path.join(tmpdir, "test_img.webp")
+            loaded = Image.open(expected_path)
+            assert loaded.format == "WEBP"
+            assert loaded.convert("RGB").getpixel((50, 50)) == (0, 128, 0)
+
     def test_save_image_nested_subdirs(self):
         """Test save_image with multiple nested subdirectories."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -177,11 +247,149 @@ class TestBaseGeneratorSaving:
         # Create a real PIL Image to test path construction
         img = Image.new("RGB", (10, 10), color="red")
         
-        with patch.object(Image.Image, 'save') as mock_save:
+        with patch('cogstim.helpers.base_generator.save_image_file') as mock_save:
             gen.save_image(img, "filename", "phase", "class")
             
             # Check save was called with correct path
             expected_path = os.path.join("/tmp/test", "phase", "class", "filename.png")
             mock_save.assert_called_once()
-            assert mock_save.call_args[0][0] == expected_path
+            assert mock_save.call_args[0][1] == expected_path
+
+    def test_save_encoded_writes_bytes(self):
+        """Test that encode_image output saved with save_encoded matches save_image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("RGB", (20, 20), color="red")
+
+            gen.save_image(img, "direct")
+            gen.save_encoded(gen.encode_image(img), "encoded")
+            with gen.background_writes():
+                gen.save_encoded(gen.encode_image(img), "queued")
+
+            with open(os.path.join(tmpdir, "direct.png"), "rb") as f:
+                expected = f.read()
+            for name in ("encoded", "queued"):
+                with open(os.path.join(tmpdir, f"{name}.png"), "rb") as f:
+                    assert f.read() == expected
+
+
+class TestBaseGeneratorBackgroundWrites:
+    """Test saving images on a background thread."""
+
+    def test_background_writes_saves_all_images(self):
+        """Test that all queued images are on disk when the block exits."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("RGB", (20, 20), color="red")
+
+            with gen.background_writes(maxsize=2):
+                for i in range(5):
+                    gen.save_image(img, f"img_{i}")
+
+            assert sorted(os.listdir(tmpdir)) == [f"img_{i}.png" for i in range(5)]
+            assert gen._writer is None
+
+    def test_background_writes_reraises_save_errors(self):
+        """Test that a failed save is reported when the block exits."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("RGB", (20, 20), color="red")
+
+            with pytest.raises(OSError):
+                with gen.background_writes():
+                    gen.save_image(img, "img", "missing_dir")
+
+    def test_background_writes_keeps_block_error(self):
+        """Test that a failed save does not hide an error raised in the block."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png"})
+            img = Image.new("RGB", (20, 20), color="red")
+
+            with pytest.raises(ValueError, match="block failed"):
+                with gen.background_writes():
+                    gen.save_image(img, "img", "missing_dir")
+                    raise ValueError("block failed")
+            assert gen._writer is None
+
+
+class TestBaseGeneratorTarShard:
+    """Test writing images into a single tar archive."""
+
+    def test_tar_shard_archives_images(self):
+        """Test that images go into the archive, named by their relative path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = BaseGenerator({"output_dir": tmpdir, "img_format": "png", "shard": "tar"})
+            img = Image.new("RGB", (20, 20), color="red")
+
+            with gen.background_writes():
+                for i in range(3):
+                    gen.save_image(img, f"img_{i}", "train", "red")
+
+            assert os.listdir(tmpdir) == ["images.tar"]
+            with tarfile.open(gen.get_archive_path()) as tar:
+                names = tar.getnames()
+                loaded = Image.open(tar.extractfile("train/red/img_0.png"))
+                assert loaded.getpixel((10, 10)) == (255, 0, 0)
+            assert names == [f"train/red/img_{i}.png" for i in range(3)]
+
+    def test_tar_shard_with_workers(self):
+        """Test that images saved by worker processes end up in the archive."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = _ImageGenerator(
+                {"output_dir": tmpdir, "img_format": "png", "shard": "tar", "workers": 2}
+            )
+            names = [f"img_{i}" for i in range(6)]
+
+            with gen.background_writes():
+                gen.run_tasks("save_red_image", [(name,) for name in names])
+
+            with tarfile.open(gen.get_archive_path()) as tar:
+                assert sorted(tar.getnames()) == [f"{name}.png" for name in names]
+
+
+class _ImageGenerator(BaseGenerator):
+    """Minimal generator that saves one image per task."""
+
+    def save_red_image(self, name):
+        self.save_image(Image.new("RGB", (8, 8), color="red"), name)
+
+
+class _RecordingGenerator(BaseGenerator):
+    """Minimal generator that writes one marker file per task."""
+
+    def write_marker(self, name):
+        with open(os.path.join(self.output_dir, name), "w") as f:
+            f.write(name)
+
+
+class TestBaseGeneratorRunTasks:
+    """Test BaseGenerator task execution."""
+
+    def test_num_workers_default(self):
+        """Test that generation is sequential by default."""
+        gen = BaseGenerator({"output_dir": "/tmp/test"})
+        assert gen.get_num_workers() == 1
+
+    def test_num_workers_zero_uses_all_cores(self):
+        """Test that workers=0 uses one worker per CPU core."""
+        gen = BaseGenerator({"output_dir": "/tmp/test", "workers": 0})
+        assert gen.get_num_workers() == (os.cpu_count() or 1)
+
+    def test_run_tasks_sequential_order(self):
+        """Test that a single worker runs tasks in order in-process."""
+        gen = BaseGenerator({"output_dir": "/tmp/test"})
+        gen.work = MagicMock()
+
+        gen.run_tasks("work", [(1, "a"), (2, "b")])
+
+        assert gen.work.call_args_list == [call(1, "a"), call(2, "b")]
+
+    def test_run_tasks_worker_pool(self):
+        """Test that several workers run every task."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen = _RecordingGenerator({"output_dir": tmpdir, "workers": 2})
+            names = [f"task_{i}" for i in range(6)]
+
+            gen.run_tasks("write_marker", [(name,) for name in names])
 
+            assert sorted(os.listdir(tmpdir)) == names
@@ -1,29 +1,18 @@
-import sys
 from pathlib import Path
-import importlib
 import pytest
 
+from cogstim import cli
+
+pytestmark = pytest.mark.slow
+
 
 # ---------------------------------------------------------------------------
 # Helper to invoke the CLI programmatically
 # ---------------------------------------------------------------------------
 
 def _run_cli_with_args(args_list):
-    """Invoke `cogstim.cli.main()` with a fresh `sys.argv`.
-
-    The CLI parses `sys.argv` directly, so we temporarily patch it, execute the
-    main function, and then restore the original argv to avoid side-effects.
-    """
-    import cogstim.cli as cli
-
-    original_argv = sys.argv.copy()
-    try:
-        sys.argv = ["cogstim", *map(str, args_list)]
-        # Reload the module to ensure no stale state between invocations
-        importlib.reload(cli)
-        cli.main()
-    finally:
-        sys.argv = original_argv
+    """Invoke `cogstim.cli.main()` with the given arguments."""
+    cli.main([str(arg) for arg in args_list])
 
 
 # ---------------------------------------------------------------------------
@@ -57,6 +46,8 @@ def test_cli_colours_subcommand(tmp_path):
         "--test-num", 1,
         "--shape", "circle",
         "--colours", "yellow", "blue",
+        "--min-surface", 10000,
+        "--max-surface", 10001,
         "--output-dir", str(tmp_path),
         "--version-tag", "",
     ]
@@ -248,6 +239,8 @@ def test_cli_demo_mode(tmp_path):
     cli_args = [
         "shapes",
         "--demo",
+        "--min-surface", 10000,
+        "--max-surface", 10001,
         "--output-dir", str(tmp_path),
         "--version-tag", "",
     ]
@@ -282,6 +275,8 @@ def test_cli_with_seed(tmp_path):
         "--train-num", 2,
         "--test-num", 0,
         "--seed", 1234,
+        "--min-surface", 10000,
+        "--max-surface", 10301,
         "--output-dir", str(tmp_path / "run1"),
     ]
     
@@ -290,6 +285,8 @@ def test_cli_with_seed(tmp_path):
         "--train-num", 2,
         "--test-num", 0,
         "--seed", 1234,
+        "--min-surface", 10000,
+        "--max-surface", 10301,
         "--output-dir", str(tmp_path / "run2"),
     ]
     
@@ -310,6 +307,8 @@ def test_cli_quiet_mode(tmp_path, capsys):
         "--train-num", 1,
         "--test-num", 0,
         "--quiet",
+        "--min-surface", 10000,
+        "--max-surface", 10001,
         "--output-dir", str(tmp_path),
         "--version-tag", "",
     ]
@@ -339,3 +338,22 @@ def test_cli_version_tag(tmp_path):
     assert len(images) >= 1, "Should generate images"
     # Check that version tag appears in filenames
     assert any("v2" in img.name for img in images), "Version tag should appear in filenames"
+
+
+def test_cli_png_compress_level(tmp_path):
+    """Test --png-compress-level flag."""
+    sizes = {}
+    for level in (0, 9):
+        out_dir = tmp_path / str(level)
+        _run_cli_with_args([
+            "fixation",
+            "--types", "A",
+            "--output-dir", str(out_dir),
+            "--png-compress-level", level,
+        ])
+        images = list(out_dir.rglob("*.png"))
+        assert len(images) == 1
+        sizes[level] = images[0].stat().st_size
+
+    # Level 0 stores the pixels uncompressed
+    assert sizes[0] > sizes[9]
@@ -5,9 +5,12 @@ real images and checking their properties. Images are saved to test_images/
 directory for manual inspection.
 """
 
+import multiprocessing
 from pathlib import Path
+from unittest.mock import patch
 from PIL import Image
 import numpy as np
+import pytest
 
 from cogstim.generators.dots_ans import DotsANSGenerator, GENERAL_CONFIG as ANS_GENERAL_CONFIG
 from cogstim.generators.match_to_sample import MatchToSampleGenerator, GENERAL_CONFIG as MTS_GENERAL_CONFIG
@@ -16,19 +19,12 @@ from cogstim.generators.lines import LinesGenerator
 from cogstim.generators.fixation import FixationGenerator
 
 
-def get_test_images_dir():
-    """Get the test_images directory path, creating it if it doesn't exist."""
-    test_images_dir = Path("test_images")
-    test_images_dir.mkdir(exist_ok=True)
-    return test_images_dir
-
-
 class TestANSImageGeneration:
     """Test ANS dot array image generation end-to-end."""
 
     def test_ans_easy_ratios_generation(self, tmp_path):
         """Test ANS generation with easy ratios."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 2,
@@ -88,7 +84,7 @@ class TestANSImageGeneration:
 
     def test_ans_hard_ratios_generation(self, tmp_path):
         """Test ANS generation with hard ratios."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 1,
@@ -133,7 +129,7 @@ class TestANSImageGeneration:
 
     def test_ans_one_colour_generation(self, tmp_path):
         """Test ANS generation in one-colour mode."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 1,
@@ -179,7 +175,7 @@ class TestANSImageGeneration:
 
     def test_ans_separated_layout_generation(self, tmp_path):
         """Test ANS generation with separated layout produces valid images."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 1,
@@ -222,7 +218,7 @@ class TestANSImageGeneration:
 
     def test_ans_separated_equalized_generation(self, tmp_path):
         """Test that separated + equalized images are generated correctly."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 1,
@@ -254,7 +250,7 @@ class TestMatchToSampleImageGeneration:
 
     def test_mts_easy_ratios_generation(self, tmp_path):
         """Test MTS generation with easy ratios."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **MTS_GENERAL_CONFIG,
             "train_num": 1,
@@ -310,7 +306,7 @@ class TestMatchToSampleImageGeneration:
 
     def test_mts_hard_ratios_generation(self, tmp_path):
         """Test MTS generation with hard ratios."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **MTS_GENERAL_CONFIG,
             "train_num": 1,
@@ -354,7 +350,7 @@ class TestMatchToSampleImageGeneration:
 
     def test_mts_equalized_pairs(self, tmp_path):
         """Test MTS generation with area equalization."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **MTS_GENERAL_CONFIG,
             "train_num": 1,
@@ -407,7 +403,7 @@ class TestShapesImageGeneration:
 
     def test_shapes_generation(self, tmp_path):
         """Test shape generation."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         generator = ShapesGenerator(
             shapes=["circle", "square", "triangle"],
             colours=["blue"],
@@ -451,7 +447,7 @@ class TestLinesImageGeneration:
 
     def test_lines_generation(self, tmp_path):
         """Test line pattern generation."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             "output_dir": str(test_images_dir / "lines"),
             "train_num": 2,
@@ -498,7 +494,7 @@ class TestFixationImageGeneration:
 
     def test_fixation_generation(self, tmp_path):
         """Test fixation target generation."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             "output_dir": str(test_images_dir / "fixation"),
             "train_num": 2,
@@ -548,7 +544,7 @@ class TestCLIIntegration:
         import sys
         from unittest.mock import patch
         
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         cli_args = [
             "ans",
             "--train-num", "1",
@@ -588,7 +584,7 @@ class TestCLIIntegration:
         import sys
         from unittest.mock import patch
         
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         cli_args = [
             "match-to-sample",
             "--train-num", "1",
@@ -624,7 +620,7 @@ class TestCLIIntegration:
         import sys
         from unittest.mock import patch
         
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         cli_args = [
             "one-colour",
             "--train-num", "1",
@@ -660,7 +656,7 @@ class TestImageProperties:
 
     def test_image_dimensions_consistency(self, tmp_path):
         """Test that all generated images have consistent dimensions."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         # Generate different types of images
         configs = [
             {
@@ -715,7 +711,7 @@ class TestImageProperties:
 
     def test_image_content_diversity(self, tmp_path):
         """Test that generated images have diverse content."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **ANS_GENERAL_CONFIG,
             "train_num": 3,
@@ -761,7 +757,7 @@ class TestImageProperties:
 
     def test_image_file_properties(self, tmp_path):
         """Test file properties of generated images."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         config = {
             **MTS_GENERAL_CONFIG,
             "train_num": 1,
@@ -802,7 +798,7 @@ class TestSeedDeterminism:
 
     def test_ans_seed_determinism(self, tmp_path):
         """Test that ANS generation with same seed produces identical images."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         
         config1 = {
             **ANS_GENERAL_CONFIG,
@@ -864,7 +860,7 @@ class TestSeedDeterminism:
 
     def test_shapes_seed_determinism(self, tmp_path):
         """Test that shapes generation with same seed produces identical images."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         
         # Generate images with seed=123 (first run)
         config1 = {
@@ -930,7 +926,7 @@ class TestSeedDeterminism:
 
     def test_different_seeds_produce_different_images(self, tmp_path):
         """Test that different seeds produce different images."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         
         # Generate images with seed=1
         config1 = {
@@ -998,7 +994,7 @@ class TestSeedDeterminism:
 
     def test_no_seed_allows_generation(self, tmp_path):
         """Test that generation works without providing a seed."""
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         
         # Generate images without seed
         config = {
@@ -1031,6 +1027,127 @@ class TestSeedDeterminism:
             assert img.size == (512, 512), "Invalid image size"
             assert img.mode == "RGB", "Invalid image mode"
 
+    def test_ans_parallel_seed_determinism(self, tmp_path):
+        """Test that parallel ANS generation with a seed is reproducible."""
+        def run(name, workers=2):
+            config = {
+                **ANS_GENERAL_CONFIG,
+                "train_num": 1,
+                "test_num": 1,
+                "output_dir": str(tmp_path / name),
+                "ratios": "easy",
+                "ONE_COLOUR": False,
+                "min_point_num": 2,
+                "max_point_num": 4,
+                "seed": 1234,
+                "workers": workers,
+                "img_format": "png",
+                "version_tag": "",
+            }
+            DotsANSGenerator(config).generate_images()
+            return sorted(p.relative_to(tmp_path / name) for p in (tmp_path / name).glob("**/*.png"))
+
+        images1 = run("run1")
+        images2 = run("run2")
+
+        assert len(images1) > 0, "Parallel run produced no images"
+        assert images1 == images2, "Parallel runs produced different file sets"
+        for rel_path in images1:
+            with Image.open(tmp_path / "run1" / rel_path) as img1, Image.open(tmp_path / "run2" / rel_path) as img2:
+                assert np.array_equal(np.array(img1), np.array(img2)), f"Image {rel_path} differs between parallel runs"
+
+        # Per-task seeds make the output independent of the number of workers
+        sequential = run("sequential", workers=1)
+        assert sequential == images1, "Sequential and parallel runs produced different file sets"
+        for rel_path in images1:
+            with Image.open(tmp_path / "run1" / rel_path) as img1, Image.open(tmp_path / "sequential" / rel_path) as img2:
+                assert np.array_equal(np.array(img1), np.array(img2)), f"Image {rel_path} differs between sequential and parallel runs"
+
+    def test_mts_parallel_matches_sequential(self, tmp_path):
+        """Test that seeded MTS generation gives the same pairs with and without workers."""
+        def run(name, workers):
+            config = {
+                **MTS_GENERAL_CONFIG,
+                "train_num": 1,
+                "test_num": 0,
+                "output_dir": str(tmp_path / name),
+                "ratios": "easy",
+                "min_point_num": 2,
+                "max_point_num": 5,
+                "background_colour": "white",
+                "dot_colour": "black",
+                "seed": 99,
+                "workers": workers,
+                "img_format": "png",
+                "version_tag": "",
+            }
+            MatchToSampleGenerator(config).generate_images()
+            return sorted(p.relative_to(tmp_path / name) for p in (tmp_path / name).glob("**/*.png"))
+
+        parallel = run("parallel", workers=2)
+        sequential = run("sequential", workers=1)
+
+        assert len(parallel) > 0, "Parallel run produced no images"
+        assert parallel == sequential, "Parallel and sequential runs produced different file sets"
+        for rel_path in parallel:
+            with Image.open(tmp_path / "parallel" / rel_path) as img1, Image.open(tmp_path / "sequential" / rel_path) as img2:
+                assert np.array_equal(np.array(img1), np.array(img2)), f"Image {rel_path} differs"
+
+    def test_shapes_parallel_matches_sequential(self, tmp_path):
+        """Test that seeded shapes generation gives the same images with and without workers."""
+        def run(name, workers):
+            ShapesGenerator(
+                shapes=["circle", "star"],
+                colours=["yellow"],
+                task_type="two_shapes",
+                output_dir=str(tmp_path / name),
+                train_num=2,
+                test_num=1,
+                min_surface=8000,
+                max_surface=9000,
+                jitter=True,
+                background_colour="white",
+                seed=5,
+                random_rotation=False,
+                img_format="png",
+                version_tag="",
+                workers=workers,
+            ).generate_images()
+            return sorted(p.relative_to(tmp_path / name) for p in (tmp_path / name).glob("**/*.png"))
+
+        parallel = run("parallel", workers=2)
+        sequential = run("sequential", workers=1)
+
+        assert len(parallel) > 0, "Parallel run produced no images"
+        assert parallel == sequential, "Parallel and sequential runs produced different file sets"
+        for rel_path in parallel:
+            with Image.open(tmp_path / "parallel" / rel_path) as img1, Image.open(tmp_path / "sequential" / rel_path) as img2:
+                assert np.array_equal(np.array(img1), np.array(img2)), f"Image {rel_path} differs"
+
+    @pytest.mark.filterwarnings("error::DeprecationWarning")
+    def test_parallel_workers_are_not_forked(self, tmp_path):
+        """Worker pools are not forked from the process running the writer thread."""
+        config = {
+            **ANS_GENERAL_CONFIG,
+            "train_num": 1,
+            "test_num": 0,
+            "output_dir": str(tmp_path),
+            "ratios": "easy",
+            "ONE_COLOUR": False,
+            "min_point_num": 2,
+            "max_point_num": 3,
+            "seed": 7,
+            "workers": 2,
+            "img_format": "png",
+            "version_tag": "",
+        }
+        with patch("multiprocessing.get_context", wraps=multiprocessing.get_context) as get_context:
+            DotsANSGenerator(config).generate_images()
+
+        assert get_context.call_args_list, "No process pool was started"
+        assert all(c.args[0] != "fork" for c in get_context.call_args_list)
+        assert list(tmp_path.glob("**/*.png")), "Parallel run produced no images"
+
 
 class TestCLISeedIntegration:
     """Test that the CLI correctly passes the seed to generators."""
@@ -1040,7 +1157,7 @@ class TestCLISeedIntegration:
         import sys
         from cogstim.cli import main
         
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         output_dir1 = str(test_images_dir / "cli_shapes_seed1")
         output_dir2 = str(test_images_dir / "cli_shapes_seed2")
         
@@ -1052,6 +1169,8 @@ class TestCLISeedIntegration:
             '--test-num', '0',
             '--output-dir', output_dir1,
             '--seed', '99',
+            '--min-surface', '10000',
+            '--max-surface', '10301',
             '--img-format', 'png'
         ])
         main()
@@ -1064,6 +1183,8 @@ class TestCLISeedIntegration:
             '--test-num', '0',
             '--output-dir', output_dir2,
             '--seed', '99',
+            '--min-surface', '10000',
+            '--max-surface', '10301',
             '--img-format', 'png'
         ])
         main()
@@ -1090,7 +1211,7 @@ class TestCLISeedIntegration:
         import sys
         from cogstim.cli import main
         
-        test_images_dir = get_test_images_dir()
+        test_images_dir = tmp_path
         output_dir1 = str(test_images_dir / "cli_ans_seed1")
         output_dir2 = str(test_images_dir / "cli_ans_seed2")
         
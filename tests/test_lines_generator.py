@@ -96,36 +96,19 @@ def test_stripe_pattern_generator_exception_handling():
 
 def test_parse_args_defaults():
     """Test argument parsing with defaults."""
-    with patch('argparse.ArgumentParser.parse_args') as mock_parse:
-        mock_parse.return_value = type('Args', (), {
-            'output_dir': '../images/head_rotation_one_stripe',
-            'img_sets': 50,
-            'angles': [0, 45, 90, 135],
-            'min_stripes': 2,
-            'max_stripes': 10,
-            'img_size': 512,
-            'tag': '',
-            'min_thickness': 10,
-            'max_thickness': 30,
-            'min_spacing': 5,
-            'max_attempts': 10000,
-            'img_format': 'png',
-        })()
-
-        args = parse_args()
-
-        assert args.output_dir == '../images/head_rotation_one_stripe'
-        assert args.img_sets == 50
-        assert args.angles == [0, 45, 90, 135]
-        assert args.min_stripes == 2
-        assert args.max_stripes == 10
-        assert args.img_size == 512
-        assert args.tag == ''
-        assert args.min_thickness == 10
-        assert args.max_thickness == 30
-        assert args.min_spacing == 5
-        assert args.max_attempts == 10000
-        assert args.img_format == 'png'
+    args = parse_args([])
+
+    assert args.output_dir == '../images/head_rotation_one_stripe'
+    assert args.img_sets == 50
+    assert args.angles == [0, 45, 90, 135]
+    assert args.min_stripes == 2
+    assert args.max_stripes == 10
+    assert args.img_size == 512
+    assert args.tag == ''
+    assert args.min_thickness == 10
+    assert args.max_thickness == 30
+    assert args.min_spacing == 5
+    assert args.max_attempts == 10000
 
 @patch('cogstim.generators.lines.LinesGenerator')
 def test_main_success(mock_generator_class):
@@ -1,6 +1,7 @@
 """Tests for cogstim.generators.match_to_sample module."""
 
 import tempfile
+import pytest
 from unittest.mock import MagicMock, patch
 
 from cogstim.generators.match_to_sample import (
@@ -8,9 +9,9 @@ from cogstim.generators.match_to_sample import (
     GENERAL_CONFIG as MTS_GENERAL_CONFIG,
 )
 from cogstim.helpers.constants import MTS_EASY_RATIOS, MTS_HARD_RATIOS
-from cogstim.helpers.planner import GenerationPlan, load_mts_tasks_from_csv
-from cogstim.helpers.dots_core import DotsCore
-from cogstim.helpers.mts_geometry import equalize_pair as geometry_equalize_pair
+from cogstim.helpers.planner import GenerationPlan, load_mts_tasks_from_csv, resolve_ratios
+from cogstim.helpers.dots_core import DotsCore, PointLayoutError
+from cogstim.helpers.mts_geometry import NUM_SYMMETRIES, equalize_pair as geometry_equalize_pair, transform_points
 from cogstim.generators.match_to_sample import save_image_pair, build_basename
 
 
@@ -105,6 +106,24 @@ class TestMatchToSampleGenerator:
                 ratio = n / m
                 assert ratio in plan.ratios or (1/ratio) in plan.ratios
 
+    def test_compute_positions_values(self):
+        """Test compute_positions returns exactly the integer pairs matching a ratio."""
+        plan = GenerationPlan("mts", 2, 10, 1, ratios=[1 / 2, 2 / 3, 3 / 4])
+        assert plan.compute_positions() == [
+            (2, 3), (2, 4), (3, 4), (3, 6), (4, 6), (4, 8), (5, 10), (6, 8), (6, 9)
+        ]
+
+    def test_compute_positions_exact_for_inexact_floats(self):
+        """Test that ratios whose float division is inexact still give their pairs."""
+        # 15 / (3 / 11) == 55.00000000000001 in floating point
+        plan = GenerationPlan("mts", 1, 60, 1, ratios=[3 / 11])
+        assert plan.compute_positions() == [(3, 11), (6, 22), (9, 33), (12, 44), (15, 55)]
+
+    def test_resolve_ratios_drops_duplicates(self):
+        """Test that repeated ratios are resolved once, keeping their first position."""
+        assert resolve_ratios([1 / 2, 2 / 3, 1 / 2], [], []) == [1 / 2, 2 / 3]
+        assert resolve_ratios("all", [1 / 2, 3 / 4], [3 / 4, 7 / 8]) == [1 / 2, 3 / 4, 7 / 8]
+
     def test_generate_images(self):
         """Test generate_images method."""
         with patch('cogstim.generators.match_to_sample.os.makedirs'), \
@@ -133,6 +152,58 @@ class TestMatchToSampleGenerator:
             mock_create.assert_called_once_with(4, 5, False)
             mock_save.assert_called_once()
 
+    def test_create_and_save_cached_layouts(self):
+        """Test that cache_layouts shares one random layout between repetitions."""
+        config = {**self.config, "cache_layouts": 2, "seed": 7}
+        with patch('cogstim.generators.match_to_sample.os.makedirs'), \
+             patch.object(MatchToSampleGenerator, 'save_image_pair') as mock_save:
+            generator = MatchToSampleGenerator(config)
+            with patch.object(
+                MatchToSampleGenerator, 'create_image_pair', wraps=generator.create_image_pair
+            ) as mock_create:
+                for rep in range(4):
+                    generator.create_and_save(rep, 3, 4, False, "train", rep=rep)
+
+            # Repetitions 0-1 and 2-3 each share one layout
+            assert mock_create.call_count == 2
+            pairs = [c[0][0] for c in mock_save.call_args_list]
+            size = config["init_size"]
+            assert pairs[1][1] == transform_points(pairs[0][1], size, 1)
+            assert pairs[1][3] == transform_points(pairs[0][3], size, 1)
+            assert pairs[2][1] != pairs[0][1]
+            # Every image gets its own canvas
+            assert len({id(p[0]) for p in pairs}) == 4
+
+    def test_cached_layouts_give_distinct_trials(self, tmp_path):
+        """Repeated (n, n) tasks within a repetition must not share a cached layout."""
+        config = {
+            **self.config,
+            "cache_layouts": 2,
+            "seed": 1,
+            "min_point_num": 2,
+            "max_point_num": 6,
+            "train_num": 2,
+            "test_num": 0,
+            "output_dir": str(tmp_path),
+            "img_format": "png",
+            "version_tag": "",
+        }
+        generator = MatchToSampleGenerator(config)
+        generator.generate_images()
+
+        images = sorted(tmp_path.rglob("*.png"))
+        assert images
+        contents = {p.read_bytes() for p in images}
+        assert len(contents) == len(images)
+
+    @pytest.mark.parametrize("cache_layouts", [-1, NUM_SYMMETRIES + 1])
+    def test_cache_layouts_out_of_range_raises(self, cache_layouts):
+        """cache_layouts beyond the canvas symmetries would repeat identical trials."""
+        config = {**self.config, "cache_layouts": cache_layouts}
+        with patch('cogstim.generators.match_to_sample.os.makedirs'):
+            with pytest.raises(ValueError, match="cache_layouts must be between 0 and 8"):
+                MatchToSampleGenerator(config)
+
 
 class TestHelperFunctions:
     """Test helper functions in match_to_sample module."""
@@ -241,6 +312,39 @@ class TestHelperFunctions:
         )
         assert result[0] is False
 
+    def test_equalize_incremental_recomputes_only_grown_area(self):
+        """Test that the +1 px fallback only recomputes the area of the grown set."""
+        s_np = MagicMock()
+        m_np = MagicMock()
+        s_np.compute_area.side_effect = DotsCore.compute_area
+        s_np.scale_total_area.side_effect = PointLayoutError("scaling failed")
+        s_np.increase_all_radii.side_effect = lambda points, inc: [
+            ((p[0][0], p[0][1], p[0][2] + inc), p[1]) for p in points
+        ]
+        s_np.validate_layout.return_value = True
+        m_np.compute_area.return_value = 2000
+        s_points = [((100, 100, 10), "colour_1")]
+        m_points = [((300, 300, 25), "colour_1")]
+
+        success, s_out, _ = geometry_equalize_pair(
+            s_np, s_points, m_np, m_points,
+            rel_tolerance=0.05, abs_tolerance=2, attempts_limit=100
+        )
+
+        assert success is True
+        assert s_out[0][0][2] == 25
+        assert m_np.compute_area.call_count == 1
+
+    def test_transform_points_preserves_layout(self):
+        """Test that canvas symmetries keep distances and stay on the canvas."""
+        points = [((20, 30, 5), "colour_1"), ((70, 60, 8), "colour_1")]
+        assert transform_points(points, 100, 0) == points
+        for index in range(8):
+            (a, _), (b, _) = transform_points(points, 100, index)
+            assert (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 == 50 ** 2 + 30 ** 2
+            assert all(0 <= v <= 100 for v in (*a[:2], *b[:2]))
+        assert len({tuple(transform_points(points, 100, i)) for i in range(8)}) == 8
+
     def test_save_image_pair(self):
         """Test save_image_pair function."""
         s_np = MagicMock()
@@ -1,4 +1,12 @@
-from cogstim.helpers.dots_core import DotsCore
+import numpy as np
+import pytest
+
+from cogstim.helpers.dots_core import (
+    DotsCore,
+    PointLayoutError,
+    _first_fitting_candidate_loop,
+    _first_fitting_candidate_vectorized,
+)
 from cogstim.helpers.constants import COLOUR_MAP
 
 
@@ -49,6 +57,91 @@ def test_equalize_areas():
     assert generator._check_points_not_overlapping(equalized[0][0], equalized[1][0])
 
 
+def test_equalize_areas_grows_small_colour_uniformly():
+    """All dots of a colour grow by the same number of pixels."""
+    generator = _make_number_points()
+    point_array = [
+        ((100, 100, 10), "colour_1"),
+        ((100, 300, 12), "colour_1"),
+        ((400, 400, 30), "colour_2"),
+    ]
+
+    equalized = generator.equalize_areas(point_array)
+
+    increases = [new[0][2] - old[0][2] for new, old in zip(equalized, point_array)]
+    assert increases[0] == increases[1] > 0
+    assert [p[1] for p in equalized] == [p[1] for p in point_array]
+
+
+def test_has_overlaps_matches_pairwise_check():
+    generator = _make_number_points()
+    np.random.seed(3)
+    for _ in range(20):
+        points = [((x, y, r), "colour_1") for x, y, r in zip(
+            np.random.randint(0, 512, 6), np.random.randint(0, 512, 6), np.random.randint(5, 40, 6)
+        )]
+        pairwise = all(
+            generator._check_points_not_overlapping(points[i][0], points[j][0])
+            for i in range(len(points)) for j in range(i + 1, len(points))
+        )
+        assert generator._has_overlaps(points) == (not pairwise)
+
+
+def test_placement_density():
+    generator = _make_number_points()
+    # Dots take up a disk of radius min_point_radius + point_sep / 2
+    dot_area = np.pi * (5 + generator.point_sep / 2) ** 2
+    circle_area = np.pi * (256 - generator.boundary_width - generator.point_sep / 2) ** 2
+    assert generator.placement_density(10) == pytest.approx(10 * dot_area / circle_area)
+
+    region = (0, 110, 0, 210)
+    assert generator.placement_density(4, region) == pytest.approx(4 * dot_area / (100 * 200))
+
+
+def test_design_points_avoid_existing_large_points():
+    """New dots must not overlap existing dots larger than max_point_radius."""
+    generator = _make_number_points()
+    # A dot grown well beyond max_point_radius (e.g. by area equalization)
+    existing = [((256, 256, 120), "colour_1")]
+    points = generator.design_n_points(20, "colour_2", point_array=existing)
+
+    assert len(points) == 21
+    for i in range(len(points)):
+        for j in range(i + 1, len(points)):
+            assert generator._check_points_not_overlapping(points[i][0], points[j][0])
+
+
+def test_design_points_raises_after_attempts_limit():
+    """Placement gives up with PointLayoutError once attempts_limit is exceeded."""
+    generator = _make_number_points(init_size=100)
+    generator.attempts_limit = 50
+    with pytest.raises(PointLayoutError):
+        generator.design_n_points(200, "colour_1")
+
+
+def test_overlap_kernels_agree():
+    """The scalar (numba) and vectorized overlap kernels pick the same candidate."""
+    rng = np.random.default_rng(0)
+    for num_placed in (0, 1, 5, 30):
+        placed = rng.uniform(0, 512, (3, num_placed))
+        placed[2] = rng.integers(5, 30, num_placed)
+        x, y = rng.uniform(0, 512, (2, 32))
+        r = rng.integers(5, 30, 32)
+        assert _first_fitting_candidate_loop(x, y, r, *placed, 10) == \
+            _first_fitting_candidate_vectorized(x, y, r, *placed, 10)
+
+
+def test_canvas_allocated_only_when_drawing():
+    """Designing a layout should not allocate an image until points are drawn."""
+    generator = _make_number_points()
+    points = generator.design_n_points(3, "colour_1")
+    assert generator._canvas is None
+
+    img = generator.draw_points(points)
+    assert img is generator.canvas.img
+    assert img.size == (512, 512)
+
+
 class TestRectangularPlacement:
     """Tests for _create_random_point_in_rect and region-constrained design_n_points."""
 
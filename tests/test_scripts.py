@@ -57,6 +57,22 @@ class TestMtsAreaReport:
         finally:
             tmp_path.unlink()
 
+    def test_compute_foreground_area_counts_near_white(self):
+        """Any pixel that is not exactly white counts, whatever its alpha."""
+        img_array = np.full((10, 10, 4), 255, dtype=np.uint8)
+        img_array[0, 0] = [255, 255, 254, 255]
+        img_array[0, 1] = [254, 255, 255, 255]
+        img_array[0, 2] = [255, 255, 255, 0]  # transparent white is background
+
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+            Image.fromarray(img_array).save(tmp.name)
+            tmp_path = Path(tmp.name)
+
+        try:
+            assert compute_foreground_area(tmp_path) == 2
+        finally:
+            tmp_path.unlink()
+
     def test_filename_regex_matching(self):
         """Test FILENAME_RE regex pattern matching (mts_{trial_id}_{r|e}_{a|b}_{n_dots}[_version].png)."""
         valid_cases = [
@@ -128,6 +144,25 @@ class TestMtsAreaReport:
                 assert row2["tag"] == "00001"
                 assert row2["equalized"] == "1"
 
+    def test_main_function_workers_match_sequential(self):
+        """Measuring images in worker processes writes the same CSV."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            img_dir = Path(tmpdir)
+            for i, base_name in enumerate(["mts_00000_r_b_2", "mts_00000_r_a_3", "mts_00001_e_b_4", "mts_00001_e_a_5"]):
+                img_array = np.full((100, 100, 3), 255, dtype=np.uint8)
+                img_array[10:20 + i, 10:20] = [0, 0, 0]
+                Image.fromarray(img_array).save(img_dir / f"{base_name}.png")
+
+            outputs = []
+            for workers in ("1", "2"):
+                output_csv = img_dir / f"out_{workers}.csv"
+                with patch('sys.argv', ['mts_area_report.py', '--dir', str(img_dir), '--out', str(output_csv), '--workers', workers]):
+                    mts_area_report_main()
+                outputs.append(output_csv.read_text(encoding="utf-8"))
+
+            assert outputs[0] == outputs[1]
+            assert "mts_00000_r,2,3,00000,0,100,110," in outputs[0]
+
     def test_main_function_with_incomplete_pairs(self):
         """Test main function with incomplete pairs (missing match files)."""
         with tempfile.TemporaryDirectory() as tmpdir:
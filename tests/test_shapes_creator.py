@@ -202,6 +202,19 @@ def test_get_radius_from_surface_invalid_shape():
         ShapesGenerator.get_radius_from_surface("invalid", 1000)
 
 
+def test_create_star_vertices():
+    vertices = ShapesGenerator.create_star_vertices((100, 200), 50)
+
+    assert len(vertices) == 10
+    # First point of the star is straight above the centre
+    assert vertices[0] == pytest.approx((100, 150))
+    distances = [((x - 100) ** 2 + (y - 200) ** 2) ** 0.5 for x, y in vertices]
+    assert distances[0::2] == pytest.approx([50] * 5)
+    inner = distances[1]
+    assert 0 < inner < 50
+    assert distances[1::2] == pytest.approx([inner] * 5)
+
+
 def test_get_vertices_invalid_shape():
     """Test get_vertices with invalid shape."""
     sg = ShapesGenerator(
@@ -258,3 +271,32 @@ def test_generate_images_two_colors():
                 args = call[0]
                 shape_arg = args[1]  # shape parameter
                 assert shape_arg == "circle"  # Should always be the base shape
+
+
+def test_generate_images_without_jitter_draws_each_shape_once(tmp_path):
+    """Without jitter or rotation, repeated images are drawn and encoded once."""
+    sg = ShapesGenerator(
+        shapes=["circle", "star"],
+        colours=["yellow"],
+        task_type="two_shapes",
+        output_dir=str(tmp_path),
+        train_num=3,
+        test_num=1,
+        jitter=False,
+        min_surface=1000,
+        max_surface=1001,
+        background_colour="black",
+        seed=None,
+        random_rotation=False,
+        version_tag="",
+        img_format="png",
+    )
+
+    with patch.object(sg, 'draw_shape', wraps=sg.draw_shape) as mock_draw:
+        sg.generate_images()
+
+    # 2 shapes × 1 surface, reused across 4 repetitions
+    assert mock_draw.call_count == 2
+    star_images = sorted(tmp_path.glob("*/star/*.png"))
+    assert len(star_images) == 4
+    assert len({p.read_bytes() for p in star_images}) == 1
@@ -0,0 +1,46 @@
+"""Tests for cogstim.helpers.summary_writer module."""
+
+import csv
+
+from cogstim.helpers.summary_writer import SummaryWriter
+
+
+class TestSummaryWriter:
+    """Test recording and writing pair statistics."""
+
+    def test_rows_include_derived_columns(self):
+        writer = SummaryWriter("/tmp/unused")
+        writer.add(3, 4, 100, 120, True)
+        writer.add(2, 0, 50, 10, 0)
+
+        assert writer.rows == [
+            [3, 4, 100, 120, 0.75, 20, 20 / 120, True],
+            [2, 0, 50, 10, 0, 40, 40 / 50, False],
+        ]
+
+    def test_write_csv(self, tmp_path):
+        writer = SummaryWriter(str(tmp_path / "out"))
+        writer.add(1, 2, 30, 60, False)
+
+        writer.write_csv()
+
+        with open(tmp_path / "out" / "summary.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == [
+            "num1", "num2", "area1_px", "area2_px", "ratio", "abs_diff_px", "rel_diff", "equalized"
+        ]
+        assert rows[1] == ["1", "2", "30", "60", "0.5", "30", "0.5", "False"]
+
+    def test_write_csv_keeps_integer_formatting(self, tmp_path):
+        writer = SummaryWriter(str(tmp_path / "out"))
+        writer.add(2, 0, 100, 40.5, True)
+
+        writer.write_csv()
+
+        with open(tmp_path / "out" / "summary.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[1][:6] == ["2", "0", "100", "40.5", "0", "59.5"]
+
+    def test_write_csv_without_rows_writes_nothing(self, tmp_path):
+        SummaryWriter(str(tmp_path / "out")).write_csv()
+        assert not (tmp_path / "out").exists()